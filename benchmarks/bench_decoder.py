@@ -0,0 +1,85 @@
+"""
+Checks the Disboard reply decoder against a corpus of replies, then measures its throughput.
+
+Run from the project root:
+
+    python -m benchmarks.bench_decoder
+
+The corpus, `benchmarks/data/disboard_replies.json`, lists reply embeds with the
+expected decoding. The throughput is compared with the previous decoder, which
+serialized the embed with `to_dict` twice and only understood minutes.
+"""
+
+import argparse
+import json
+from pathlib import Path
+import re
+import sys
+import time
+
+import discord
+from rich.table import Table
+
+from src.console import console
+from src.disboard_embed_decoder import BumpReplyKind, decode_bump_reply
+
+CORPUS_PATH = Path(__file__).parent / "data" / "disboard_replies.json"
+
+def legacy_decode(embed: discord.Embed, guild_id: int) -> tuple[bool, int]:
+    """The decoding of the previous version: (success, minutes or -1)."""
+
+    description = embed.to_dict().get("description")
+    if description is not None and f"https://disboard.org/server/{guild_id}" in description:
+        return True, 120
+    description = embed.to_dict().get("description")
+    if description is None:
+        return False, -1
+    match = re.search(r"(\d+)\s+minutes", description)
+    return False, int(match.group(1)) if match else -1
+
+def check_corpus(corpus: dict) -> int:
+    """Decode every reply of the corpus and print the mismatches. Return their number."""
+
+    failures = 0
+    for reply in corpus["Replies"]:
+        embed = discord.Embed.from_dict(reply["Embed"])
+        result = decode_bump_reply(embed, corpus["GuildId"], now=corpus["Now"])
+        expected = reply["Expected"]
+        if result.kind != BumpReplyKind(expected["Kind"]) or result.cooldown_seconds != expected["CooldownSeconds"]:
+            console.print(f"[red]Mismatch for '{reply['Name']}': got {result}, expected {expected}[/]")
+            failures += 1
+    return failures
+
+def measure(decode, embeds: list[discord.Embed], guild_id: int, iterations: int) -> float:
+    """Return the mean seconds per decoding."""
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for embed in embeds:
+            decode(embed, guild_id)
+    return (time.perf_counter() - start) / (iterations * len(embeds))
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark the Disboard reply decoder.")
+    parser.add_argument("--iterations", type=int, default=5000, help="decodings of the whole corpus")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, "r", encoding='utf-8') as file:
+        corpus = json.load(file)
+
+    failures = check_corpus(corpus)
+    console.print(f"Corpus: {len(corpus['Replies']) - failures}/{len(corpus['Replies'])} replies decoded as expected.")
+
+    embeds = [discord.Embed.from_dict(reply["Embed"]) for reply in corpus["Replies"]]
+    table = Table(title=f"Decoder throughput, {len(embeds)} replies x {args.iterations}")
+    for column in ("Decoder", "us/reply", "Replies/s"):
+        table.add_column(column, justify="right")
+    for name, decode in (("decode_bump_reply", decode_bump_reply), ("legacy", legacy_decode)):
+        seconds = measure(decode, embeds, corpus["GuildId"], args.iterations)
+        table.add_row(name, f"{seconds * 1e6:.2f}", f"{1 / seconds:,.0f}")
+    console.print(table)
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
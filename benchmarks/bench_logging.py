@@ -0,0 +1,100 @@
+"""
+Measures the cost of a log call for the thread which logs, with and without the queue.
+
+Run from the project root:
+
+    python -m benchmarks.bench_logging --calls 20000
+
+Each handler used by the program is measured twice: called directly, as when
+it was attached to the root logger, and behind the `LogPipeline` queue, where
+a background thread formats and writes the records. The time per call seen by
+the caller is reported, then, for the queued runs, the time the background
+thread needed to write everything. The output goes to the null device or to a
+temporary file, so the terminal speed does not count.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.logging import RichHandler
+from rich.table import Table
+
+from src.console import console
+from src.logging_setup import LogPipeline, build_handler
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+def rich_handler(devnull) -> logging.Handler:
+    handler = RichHandler(
+        show_path=False, rich_tracebacks=True, omit_repeated_times=False,
+        console=Console(file=devnull, force_terminal=True, width=120)
+    )
+    handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+    return handler
+
+def plain_handler(devnull) -> logging.Handler:
+    handler = build_handler("plain")
+    handler.setStream(devnull)
+    return handler
+
+def measure(handler: logging.Handler, queued: bool, calls: int) -> tuple[list[float], float]:
+    """Log `calls` records. Return the seconds of each call and the seconds until all were written."""
+
+    logger = logging.getLogger("src.bump_scheduler")
+    root = logging.getLogger()
+    pipeline = LogPipeline([handler])
+    if queued:
+        pipeline.start()
+    else:
+        root.handlers = [handler]
+        root.setLevel(logging.INFO)
+
+    durations = []
+    start = time.perf_counter()
+    for index in range(calls):
+        guild_id = 10**17 + index
+        started = time.perf_counter()
+        logger.info(f"Server {guild_id} is bumpable. Searching for available selfbot...")
+        durations.append(time.perf_counter() - started)
+    if queued:
+        pipeline.stop()
+    else:
+        handler.close()
+    root.handlers = []
+    return durations, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cost of a log call.")
+    parser.add_argument("--calls", type=int, default=20000, help="log calls per measure")
+    args = parser.parse_args()
+
+    table = Table(title=f"Log call overhead for the caller, {args.calls} calls")
+    for column in ("Handler", "Mode", "Mean (us)", "p50 (us)", "p99 (us)", "Written after (ms)"):
+        table.add_column(column, justify="right")
+
+    with open(os.devnull, "w") as devnull, tempfile.TemporaryDirectory() as directory:
+        builders = (
+            ("rich console", lambda: rich_handler(devnull)),
+            ("plain stderr", lambda: plain_handler(devnull)),
+            ("json file", lambda: build_handler("json", Path(directory) / "autobumper.log", max_bytes=1024 * 1024)),
+        )
+        for name, build in builders:
+            for queued in (False, True):
+                durations, total = measure(build(), queued, args.calls)
+                table.add_row(
+                    name, "queued" if queued else "direct",
+                    f"{statistics.mean(durations) * 1e6:.1f}", f"{percentile(durations, 0.5) * 1e6:.1f}",
+                    f"{percentile(durations, 0.99) * 1e6:.1f}", f"{total * 1000:.0f}"
+                )
+    console.print(table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Measures the memory used by one selfbot session in many busy guilds.
+
+Run from the project root, on Linux:
+
+    python -m benchmarks.bench_memory --sessions 5 --guilds 50
+
+No connection is made: synthetic gateway events (guilds with their members, then
+messages of random members) are given to the parsers of real `discord.Client`
+instances, so the caches of the library are filled as they would be by Discord.
+Two clients are compared, each in a fresh interpreter:
+
+* default: `discord.Client()`, as built by the previous versions;
+* minimal: `create_client()`, used by the sessions now.
+
+The RSS growth is reported per session, with the cost of parsing one message.
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import discord
+from rich.table import Table
+
+from src.autobump_selfbot_service import DISBOARD_BOT_ID, create_client
+from src.console import console
+
+PROJECT_ROOT = Path(__file__).parent.parent
+# One message in this many is a reply of Disboard
+DISBOARD_MESSAGE_RATIO = 100
+
+_ids = itertools.count(10**17)
+
+def _user(user_id: int) -> dict:
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+def _member(user_id: int | None = None) -> dict:
+    """Return a member, without its user as in MESSAGE_CREATE events if `user_id` is None."""
+
+    member = {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+    if user_id is not None:
+        member["user"] = _user(user_id)
+    return member
+
+def guild_payload(members: int, channels: int) -> dict:
+    """Return a guild as sent by the gateway, with its channels and members."""
+
+    guild_id = next(_ids)
+    return {
+        "id": str(guild_id), "name": f"guild{guild_id}", "owner_id": "1", "member_count": members,
+        "channels": [
+            {"id": str(next(_ids)), "type": 0, "name": f"channel{index}", "position": index,
+             "permission_overwrites": [], "guild_id": str(guild_id)}
+            for index in range(channels)
+        ],
+        "members": [_member(next(_ids)) for _ in range(members)],
+        "roles": [{
+            "id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+            "hoist": False, "managed": False, "mentionable": False
+        }],
+        "emojis": [], "stickers": [], "features": [], "threads": [], "voice_states": [], "presences": [],
+        "afk_timeout": 300, "verification_level": 0, "default_message_notifications": 0,
+        "explicit_content_filter": 0, "mfa_level": 0, "premium_tier": 0, "nsfw_level": 0,
+        "preferred_locale": "en-US", "system_channel_flags": 0, "premium_progress_bar_enabled": False
+    }
+
+def message_payload(guild: dict, author_id: int) -> dict:
+    """Return a MESSAGE_CREATE event of a member in a random channel of the guild."""
+
+    channel = guild["channels"][author_id % len(guild["channels"])]
+    return {
+        "id": str(next(_ids)), "channel_id": channel["id"], "guild_id": guild["id"],
+        "author": _user(author_id), "member": _member(),
+        "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 2,
+        "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "tts": False,
+        "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+        "pinned": False, "type": 0, "flags": 0
+    }
+
+def _rss() -> int:
+    with open("/proc/self/statm", "r") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+async def measure(client_name: str, sessions: int, guilds: int, members: int, messages: int) -> dict:
+    """Fill `sessions` clients with guilds and messages, return the RSS growth and the parse time."""
+
+    build = create_client if client_name == "minimal" else discord.Client
+    clients = []
+    parse_seconds = 0.0
+    parsed = 0
+    gc.collect()
+    start_rss = _rss()
+    for _ in range(sessions):
+        client = build()
+        state = client._connection
+        state.user = discord.ClientUser(state=state, data=_user(next(_ids)))
+        for _ in range(guilds):
+            guild = guild_payload(members, channels=10)
+            state._add_guild_from_data(guild)
+            member_ids = [int(member["user"]["id"]) for member in guild["members"]]
+            for index in range(messages):
+                author_id = DISBOARD_BOT_ID if index % DISBOARD_MESSAGE_RATIO == 0 else member_ids[index % len(member_ids)]
+                payload = message_payload(guild, author_id)
+                started = time.perf_counter()
+                state.parsers["MESSAGE_CREATE"](payload)
+                parse_seconds += time.perf_counter() - started
+                parsed += 1
+        clients.append(client)
+    gc.collect()
+
+    state = clients[0]._connection
+    return {
+        "RssPerSession": (_rss() - start_rss) / sessions,
+        "SecondsPerMessage": parse_seconds / parsed,
+        "CachedMessages": len(state._messages or ()),
+        "CachedMembers": sum(len(guild._members) for guild in state.guilds),
+        "CachedUsers": len(state._users)
+    }
+
+def run_child(client_name: str, args: argparse.Namespace) -> dict:
+    process = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_memory", "--child", client_name,
+            "--sessions", str(args.sessions), "--guilds", str(args.guilds),
+            "--members", str(args.members), "--messages", str(args.messages)
+        ],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory used by the selfbot sessions.")
+    parser.add_argument("--sessions", type=int, default=3, help="sessions per measure")
+    parser.add_argument("--guilds", type=int, default=50, help="guilds of each account")
+    parser.add_argument("--members", type=int, default=500, help="members sent per guild")
+    parser.add_argument("--messages", type=int, default=500, help="messages received per guild")
+    parser.add_argument("--child", choices=("default", "minimal"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        result = asyncio.run(measure(args.child, args.sessions, args.guilds, args.members, args.messages))
+        print(json.dumps(result))
+        return
+
+    if not Path("/proc/self/statm").exists():
+        console.print("[red]This benchmark reads the RSS from /proc and only runs on Linux.[/]")
+        sys.exit(1)
+
+    table = Table(title=(
+        f"Memory per session: {args.guilds} guilds, {args.members} members "
+        f"and {args.messages} messages per guild"
+    ))
+    for column in ("Client", "RSS/session (MB)", "us/message", "Cached messages", "Cached members", "Cached users"):
+        table.add_column(column, justify="right")
+    for client_name in ("default", "minimal"):
+        result = run_child(client_name, args)
+        table.add_row(
+            client_name, f"{result['RssPerSession'] / 1e6:.1f}", f"{result['SecondsPerMessage'] * 1e6:.1f}",
+            str(result["CachedMessages"]), str(result["CachedMembers"]), str(result["CachedUsers"])
+        )
+    console.print(table)
+
+if __name__ == "__main__":
+    main()
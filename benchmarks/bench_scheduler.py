@@ -0,0 +1,169 @@
+"""
+Benchmarks of the scheduler and of the persistence, run against `FakeDiscord`.
+
+Run from the project root:
+
+    python -m benchmarks.bench_scheduler --servers 2000
+
+Three measures are reported:
+
+* storage: the cost of persisting one server cooldown, per backend;
+* bump pass: the time spent by the program itself per bump, when every server
+  is due and Discord answers instantly;
+* wake-up: how late the commands are sent compared to the server deadlines.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from rich.table import Table
+
+from benchmarks.fake_discord import FakeDiscord
+from src.bump_scheduler import BumpScheduler
+from src.console import console
+from src.json_manager import DataManager
+from src.models import Selfbot, Server
+from src.storage import open_storage
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+def populate(data_dir: Path, backend: str, fake: FakeDiscord, servers: int, selfbots: int, deadlines: list[int] | None = None):
+    """Register synthetic servers and accounts of `fake` in a new data directory."""
+
+    storage = open_storage(data_dir, backend)
+    with storage.transaction():
+        for _ in range(selfbots):
+            user_id, token, name = fake.add_account()
+            storage.save_selfbot(Selfbot(user_id, token, name))
+        for index in range(servers):
+            guild_id, channel_id = fake.add_guild()
+            deadline = deadlines[index] if deadlines is not None else -1
+            # fresh names keep the background refresher idle
+            storage.save_server(Server(
+                guild_id, f"guild{guild_id}", channel_id, "bump", deadline, names_refreshed_at=round(time.time())
+            ))
+    storage.close()
+
+def bench_storage(servers: int, writes: int) -> Table:
+    table = Table(title=f"Storage: one cooldown write, {servers} servers")
+    for column in ("Backend", "Writes", "Mean (ms)", "p50 (ms)", "p99 (ms)", "Batched 100 (ms)"):
+        table.add_column(column, justify="right")
+
+    for backend in ("sqlite", "json"):
+        with tempfile.TemporaryDirectory() as data_dir:
+            populate(Path(data_dir), backend, FakeDiscord(), servers, 1)
+            data_manager = DataManager(data_dir, backend)
+            guild_ids = list(data_manager.servers)
+
+            durations = []
+            for index in range(writes):
+                start = time.perf_counter()
+                data_manager.set_server_cooldown(guild_ids[index % len(guild_ids)], 7200)
+                durations.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            with data_manager.batch():
+                for guild_id in guild_ids[:100]:
+                    data_manager.set_server_cooldown(guild_id, 7200)
+            batched = (time.perf_counter() - start) * 1000
+            data_manager.close()
+
+        table.add_row(
+            backend, str(writes), f"{statistics.mean(durations):.3f}",
+            f"{percentile(durations, 0.5):.3f}", f"{percentile(durations, 0.99):.3f}", f"{batched:.2f}"
+        )
+    return table
+
+async def _run_scheduler(scheduler: BumpScheduler, fake: FakeDiscord, bumps: int, timeout: float) -> float:
+    """Run the bump loop until `bumps` commands were received and return the elapsed seconds."""
+
+    # connect the sessions first, the connection is not part of the measure
+    for selfbot_id in scheduler.data_manager.selfbots:
+        await scheduler.sessions.get(selfbot_id)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(scheduler._bumping())
+    try:
+        await asyncio.wait_for(fake.wait_for_bumps(bumps), timeout)
+        return time.perf_counter() - start
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await scheduler.sessions.close_all()
+
+def bench_bump_pass(servers: int, backend: str, cooldown_ratio: float) -> Table:
+    fake = FakeDiscord()
+    with tempfile.TemporaryDirectory() as data_dir:
+        # one account per server: an account waits 30 minutes after a bump
+        populate(Path(data_dir), backend, fake, servers, servers)
+        for index, guild in enumerate(fake.guilds.values()):
+            if index < servers * cooldown_ratio:
+                guild.next_bump_at = time.time() + 3600
+
+        data_manager = DataManager(data_dir, backend, client_factory=fake.client_factory)
+        scheduler = BumpScheduler(data_manager)
+        elapsed = asyncio.run(_run_scheduler(scheduler, fake, servers, timeout=600))
+        data_manager.close()
+
+    successes = sum(record.success for record in fake.bumps)
+    table = Table(title=f"Bump pass: {servers} due servers, {backend} storage, no Discord latency")
+    for column in ("Bumps", "Successes", "Total (s)", "Per bump (ms)", "Bumps/s"):
+        table.add_column(column, justify="right")
+    table.add_row(
+        str(len(fake.bumps)), str(successes), f"{elapsed:.2f}",
+        f"{elapsed / len(fake.bumps) * 1000:.3f}", f"{len(fake.bumps) / elapsed:.0f}"
+    )
+    return table
+
+def bench_wakeup(servers: int, spread: int, backend: str) -> Table:
+    fake = FakeDiscord()
+    start = round(time.time()) + 2
+    deadlines = [start + index * spread // servers for index in range(servers)]
+    with tempfile.TemporaryDirectory() as data_dir:
+        populate(Path(data_dir), backend, fake, servers, servers, deadlines)
+        data_manager = DataManager(data_dir, backend, client_factory=fake.client_factory)
+        scheduler = BumpScheduler(data_manager)
+        asyncio.run(_run_scheduler(scheduler, fake, servers, timeout=spread + 60))
+        data_manager.close()
+
+    deadline_of = {server_id: deadline for server_id, deadline in zip(fake.guilds, deadlines)}
+    lateness = [(record.received_at - deadline_of[record.guild_id]) * 1000 for record in fake.bumps]
+    table = Table(title=f"Wake-up: {servers} deadlines over {spread} s")
+    for column in ("Bumps", "Mean late (ms)", "p50 (ms)", "p99 (ms)", "Max (ms)", "Early"):
+        table.add_column(column, justify="right")
+    table.add_row(
+        str(len(lateness)), f"{statistics.mean(lateness):.2f}", f"{percentile(lateness, 0.5):.2f}",
+        f"{percentile(lateness, 0.99):.2f}", f"{max(lateness):.2f}", str(sum(value < 0 for value in lateness))
+    )
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the auto-bumper.")
+    parser.add_argument("--servers", type=int, default=2000, help="synthetic servers of the bump pass and storage benchmarks")
+    parser.add_argument("--writes", type=int, default=200, help="cooldown writes per storage backend")
+    parser.add_argument("--backend", choices=("sqlite", "json"), default="sqlite", help="storage of the scheduler benchmarks")
+    parser.add_argument("--cooldown-ratio", type=float, default=0.1, help="share of servers Disboard reports on cooldown")
+    parser.add_argument("--wakeup-servers", type=int, default=50, help="servers of the wake-up benchmark")
+    parser.add_argument("--wakeup-spread", type=int, default=10, help="seconds over which the wake-up deadlines are spread")
+    parser.add_argument("--only", choices=("storage", "bump", "wakeup"), help="run a single benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.only in (None, "storage"):
+        console.print(bench_storage(args.servers, args.writes))
+    if args.only in (None, "bump"):
+        console.print(bench_bump_pass(args.servers, args.backend, args.cooldown_ratio))
+    if args.only in (None, "wakeup"):
+        console.print(bench_wakeup(args.wakeup_servers, args.wakeup_spread, args.backend))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Measures the startup cost of the program and checks it against a budget.
+
+Run from the project root:
+
+    python -m benchmarks.bench_startup
+
+Each path is run in a fresh interpreter, several times, and its median time is
+reported with whether it loaded `discord`:
+
+* import: the modules imported by `main.py` before the banner is shown;
+* config: the same, then the data is loaded and the selfbots and servers are
+  displayed, as the config manager does;
+* session: the selfbot service, which is only imported when an account connects.
+
+The program exits with an error if a path other than `session` loads `discord`
+or is over the budget, so that a heavy import added to the startup is noticed.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rich.table import Table
+
+from src.console import console
+from src.models import Selfbot, Server
+from src.storage import open_storage
+
+PROJECT_ROOT = Path(__file__).parent.parent
+# Median milliseconds allowed for the paths which must not load discord
+STARTUP_BUDGET_MS = 250
+
+_IMPORT = """
+import rich.text
+import rich.panel
+from rich.logging import RichHandler
+from src.bump_scheduler import BumpScheduler
+import src.json_manager as json_manager
+"""
+_CONFIG = _IMPORT + """
+import io
+from src.console import console
+console.file = io.StringIO()
+data_manager = json_manager.DataManager(data_dir={data_dir!r})
+scheduler = BumpScheduler(data_manager)
+data_manager.display_selfbots()
+data_manager.display_servers()
+data_manager.close()
+"""
+_SESSION = """
+from src.autobump_selfbot_service import AutoBumpSelfbotService
+"""
+# Wraps a path to print its duration and whether discord was loaded
+_MEASURE = """
+import sys, time, json
+_start = time.perf_counter()
+{code}
+print(json.dumps({{"Seconds": time.perf_counter() - _start, "Discord": "discord" in sys.modules}}))
+"""
+
+def populate(data_dir: Path, servers: int, selfbots: int):
+    """Register synthetic servers and accounts in a new data directory."""
+
+    storage = open_storage(data_dir, "sqlite")
+    with storage.transaction():
+        for index in range(selfbots):
+            storage.save_selfbot(Selfbot(index + 1, f"token{index}", f"account{index}"))
+        for index in range(servers):
+            guild_id = 10**17 + index
+            storage.save_server(Server(guild_id, f"guild{guild_id}", guild_id + 1, "bump", -1))
+    storage.close()
+
+def run_path(code: str, runs: int) -> tuple[float, bool]:
+    """Run `code` in `runs` fresh interpreters. Return the median seconds and whether discord was loaded."""
+
+    durations = []
+    discord_loaded = False
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-c", _MEASURE.format(code=code)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        durations.append(result["Seconds"])
+        discord_loaded |= result["Discord"]
+    return statistics.median(durations), discord_loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup of the program.")
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per path")
+    parser.add_argument("--servers", type=int, default=200, help="registered servers for the config path")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="median allowed for import and config")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        populate(data_dir, args.servers, selfbots=3)
+
+        table = Table(title=f"Startup, median of {args.runs} runs, budget {args.budget_ms:.0f} ms")
+        for column in ("Path", "Time (ms)", "Loads discord", "Status"):
+            table.add_column(column, justify="right")
+
+        failures = 0
+        started = time.perf_counter()
+        for name, code, budgeted in (
+            ("import", _IMPORT, True),
+            ("config", _CONFIG.format(data_dir=str(data_dir)), True),
+            ("session", _SESSION, False)
+        ):
+            seconds, discord_loaded = run_path(code, args.runs)
+            ok = not budgeted or (not discord_loaded and seconds * 1000 <= args.budget_ms)
+            failures += not ok
+            status = "-" if not budgeted else "[green]ok[/]" if ok else "[red]over budget[/]" if not discord_loaded else "[red]loads discord[/]"
+            table.add_row(name, f"{seconds * 1000:.1f}", "yes" if discord_loaded else "no", status)
+
+    console.print(table)
+    console.print(f"Measured in {time.perf_counter() - started:.1f}s.")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
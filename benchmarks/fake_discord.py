@@ -0,0 +1,374 @@
+"""
+Offline stand-in for the parts of Discord used by the auto-bumper.
+
+`FakeDiscord` plays both the Discord API and Disboard: it knows a set of
+accounts, guilds and channels, and answers the /bump command with a success or
+a cooldown embed after a configurable latency. Its `client_factory` replaces
+`discord.Client` in `DataManager` and `AutoBumpSelfbotService`.
+
+The commands returned by the fake channels are real `discord.SlashCommand`
+objects, so the service runs the same code as in production down to
+`state.http.interact`, which is where the fake takes over.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import itertools
+import random
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+import discord
+
+from src.autobump_selfbot_service import BUMP_SLASH_COMMAND_NAME, DISBOARD_APPLICATION_ID, DISBOARD_BOT_ID
+from src.clock import SYSTEM_CLOCK, Clock
+
+# Cooldown of a guild after a successful bump, as enforced by Disboard
+DISBOARD_COOLDOWN = 2 * 3600
+# ID of the fake /bump command
+BUMP_COMMAND_ID = 947088344167366698
+
+@dataclass
+class FakeLatency:
+    """
+    Simulated delays, in seconds.
+
+    Attributes
+    ----------
+    connect : float
+        From `Client.start` to the READY event.
+    rest : float
+        Each REST request: `fetch_channel`, `fetch_guild`, `application_commands`.
+    acknowledge : float
+        From sending the command to Discord acknowledging the interaction.
+    reply : float
+        From the acknowledgement to the reply of Disboard.
+    """
+
+    connect: float = 0
+    rest: float = 0
+    acknowledge: float = 0
+    reply: float = 0
+
+@dataclass
+class FakeGuild:
+    id: int
+    name: str
+    channels: dict[int, str] = field(default_factory=dict)
+    # timestamp after which Disboard accepts the next bump
+    next_bump_at: float = 0
+
+@dataclass
+class FakeUser:
+    id: int
+    name: str
+
+    def __str__(self) -> str:
+        return self.name
+
+@dataclass
+class BumpRecord:
+    """A /bump command received by the fake Disboard."""
+
+    guild_id: int
+    user_id: int
+    received_at: float
+    success: bool
+
+class FakeDiscord():
+    """
+    The simulated Discord API and Disboard bot shared by all the fake clients.
+
+    Attributes
+    ----------
+    latency : FakeLatency
+        The simulated delays.
+    drop_rate : float
+        The probability that Disboard never replies to a command.
+    bumps : list[BumpRecord]
+        Every /bump command received, in order.
+    clock : Clock
+        The time source of the guild cooldowns, shared with the `DataManager`
+        when the time is simulated.
+    """
+
+    def __init__(self, latency: Optional[FakeLatency] = None, drop_rate: float = 0, seed: int = 0, clock: Optional[Clock] = None):
+        self.latency = latency if latency is not None else FakeLatency()
+        self.drop_rate = drop_rate
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.bumps: list[BumpRecord] = []
+        self.guilds: dict[int, FakeGuild] = {}
+        self._accounts: dict[str, tuple[int, str]] = {}
+        self._channel_guilds: dict[int, int] = {}
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._bump_event: Optional[asyncio.Event] = None
+
+    def client_factory(self) -> "FakeClient":
+        """Build a client connected to this fake, in place of `discord.Client()`."""
+        return FakeClient(self)
+
+    def add_account(self, name: Optional[str] = None) -> tuple[int, str, str]:
+        """
+        Create an account able to log in.
+
+        Returns
+        -------
+        tuple[int, str, str]
+            The user ID, the token and the username.
+        """
+
+        user_id = self._next_id()
+        token = f"fake-token-{user_id}"
+        name = name if name is not None else f"account{user_id}"
+        self._accounts[token] = (user_id, name)
+        return user_id, token, name
+
+    def add_guild(self, name: Optional[str] = None, next_bump_at: float = 0) -> tuple[int, int]:
+        """
+        Create a guild with one bump channel.
+
+        Returns
+        -------
+        tuple[int, int]
+            The guild ID and the channel ID.
+        """
+
+        guild_id = self._next_id()
+        channel_id = self._next_id()
+        guild = FakeGuild(guild_id, name if name is not None else f"guild{guild_id}", next_bump_at=next_bump_at)
+        guild.channels[channel_id] = "bump"
+        self.guilds[guild_id] = guild
+        self._channel_guilds[channel_id] = guild_id
+        return guild_id, channel_id
+
+    def guild_of_channel(self, channel_id: int) -> Optional[FakeGuild]:
+        guild_id = self._channel_guilds.get(channel_id)
+        return self.guilds.get(guild_id) if guild_id is not None else None
+
+    async def wait_for_bumps(self, count: int):
+        """Wait until at least `count` commands were received."""
+
+        while len(self.bumps) < count:
+            if self._bump_event is None:
+                self._bump_event = asyncio.Event()
+            await self._bump_event.wait()
+            self._bump_event.clear()
+
+    def _login(self, token: str) -> tuple[int, str]:
+        account = self._accounts.get(token)
+        if account is None:
+            raise discord.LoginFailure("Improper token has been passed.")
+        return account
+
+    def _next_id(self) -> int:
+        return next(self._ids) + 10**17
+
+    def _receive_bump(self, client: "FakeClient", channel: "FakeTextChannel", nonce: str):
+        """Record a /bump command and schedule the acknowledgement and the reply."""
+
+        now = self.clock.time()
+        guild = self.guilds[channel.guild.id]
+        success = guild.next_bump_at <= now
+        if success:
+            guild.next_bump_at = now + DISBOARD_COOLDOWN
+
+        assert client.user is not None
+        self.bumps.append(BumpRecord(guild.id, client.user.id, now, success))
+        if self._bump_event is not None:
+            self._bump_event.set()
+
+        interaction = SimpleNamespace(
+            id=_snowflake(), nonce=nonce, name=BUMP_SLASH_COMMAND_NAME, user=client.user
+        )
+        if success:
+            description = (
+                "Bump done! :thumbsup:\n"
+                f"Check it on DISBOARD: https://disboard.org/server/{guild.id}"
+            )
+        else:
+            minutes = max(1, round((guild.next_bump_at - now) / 60))
+            description = (
+                f"Please wait another {minutes} minutes until the server can be bumped"
+            )
+        message = SimpleNamespace(
+            id=0,
+            author=SimpleNamespace(id=DISBOARD_BOT_ID),
+            channel=channel,
+            guild=channel.guild,
+            interaction=interaction,
+            embeds=[discord.Embed(description=description)],
+        )
+        dropped = self._random.random() < self.drop_rate
+
+        async def respond():
+            await asyncio.sleep(self.latency.acknowledge)
+            client.dispatch("interaction_finish", interaction)
+            if dropped:
+                return
+            await asyncio.sleep(self.latency.reply)
+            message.id = _snowflake()
+            client.dispatch("message", message)
+
+        client._spawn(respond())
+
+class FakeClient():
+    """The subset of `discord.Client` used by `AutoBumpSelfbotService`."""
+
+    def __init__(self, backend: FakeDiscord):
+        self._backend = backend
+        self._connection = FakeConnectionState(self)
+        self._closed = asyncio.Event()
+        self._channels: dict[int, FakeTextChannel] = {}
+        self._waiters: list[tuple[str, Callable[..., bool], asyncio.Future]] = []
+        self._tasks: set[asyncio.Task] = set()
+        self.user: Optional[FakeUser] = None
+
+    def event(self, coro):
+        setattr(self, coro.__name__, coro)
+        return coro
+
+    async def start(self, token: str):
+        await asyncio.sleep(self._backend.latency.connect)
+        user_id, name = self._backend._login(token)
+        self.user = FakeUser(user_id, name)
+        self.dispatch("ready")
+        await self._closed.wait()
+
+    async def close(self):
+        self._closed.set()
+        for task in self._tasks:
+            task.cancel()
+
+    def is_closed(self) -> bool:
+        return self._closed.is_set()
+
+    def dispatch(self, event: str, *args: Any):
+        for waiter in list(self._waiters):
+            name, check, future = waiter
+            if name == event and not future.done() and check(*args):
+                future.set_result(args[0] if len(args) == 1 else args)
+                self._waiters.remove(waiter)
+
+        handler = getattr(self, "on_" + event, None)
+        if handler is not None:
+            self._spawn(handler(*args))
+
+    async def wait_for(self, event: str, *, check: Optional[Callable[..., bool]] = None, timeout: Optional[float] = None):
+        future = asyncio.get_running_loop().create_future()
+        waiter = (event, check if check is not None else (lambda *args: True), future)
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self._backend.guilds.get(guild_id)
+
+    async def fetch_guild(self, guild_id: int) -> FakeGuild:
+        await asyncio.sleep(self._backend.latency.rest)
+        guild = self.get_guild(guild_id)
+        if guild is None:
+            raise discord.NotFound(_response(404, "Not Found"), "Unknown Guild")
+        return guild
+
+    def get_channel(self, channel_id: int) -> Optional["FakeTextChannel"]:
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            guild = self._backend.guild_of_channel(channel_id)
+            if guild is None:
+                return None
+            channel = FakeTextChannel(self, guild, channel_id, guild.channels[channel_id])
+            self._channels[channel_id] = channel
+        return channel
+
+    async def fetch_channel(self, channel_id: int) -> "FakeTextChannel":
+        await asyncio.sleep(self._backend.latency.rest)
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            raise discord.NotFound(_response(404, "Not Found"), "Unknown Channel")
+        return channel
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+class FakeConnectionState():
+    """The attributes of `ConnectionState` read by `discord.SlashCommand`."""
+
+    def __init__(self, client: FakeClient):
+        self.client = client
+        self.http = FakeHTTPClient(client)
+        self._interaction_cache: dict[str, Any] = {}
+
+    def _get_guild(self, guild_id: Optional[int]) -> Optional[FakeGuild]:
+        return self.client.get_guild(guild_id) if guild_id is not None else None
+
+class FakeHTTPClient():
+    """Receives the interactions sent by `discord.SlashCommand`."""
+
+    def __init__(self, client: FakeClient):
+        self._client = client
+
+    async def interact(self, type, data: dict[str, Any], channel: "FakeTextChannel", nonce: str, **kwargs):
+        await asyncio.sleep(0)
+        if data["name"] == BUMP_SLASH_COMMAND_NAME and int(data["id"]) == BUMP_COMMAND_ID:
+            self._client._backend._receive_bump(self._client, channel, nonce)
+        else:
+            raise discord.NotFound(_response(404, "Not Found"), "Unknown interaction")
+
+class FakeTextChannel(discord.TextChannel):
+    """
+    A text channel answering the requests of one client offline.
+
+    It subclasses `discord.TextChannel` so that the type checks of the service
+    pass, but only sets the attributes the service reads.
+    """
+
+    def __init__(self, client: FakeClient, guild: FakeGuild, channel_id: int, name: str):
+        self._client = client
+        self._state = client._connection # type: ignore
+        self.guild = guild # type: ignore
+        self.id = channel_id
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"<FakeTextChannel id={self.id} name={self.name!r}>"
+
+    async def _get_channel(self):
+        return self
+
+    async def application_commands(self) -> list[discord.SlashCommand]: # type: ignore
+        await asyncio.sleep(self._client._backend.latency.rest)
+        return [
+            discord.SlashCommand(state=self._state, data=data, channel=self) # type: ignore
+            for data in _disboard_commands(self.guild.id)
+        ]
+
+def _disboard_commands(guild_id: int) -> list[dict[str, Any]]:
+    """The payloads of the commands Disboard registers in a guild."""
+    return [
+        {
+            "id": str(BUMP_COMMAND_ID + offset),
+            "application_id": str(DISBOARD_APPLICATION_ID),
+            "name": name,
+            "description": description,
+            "version": "1",
+            "type": 1,
+            "options": [],
+        }
+        for offset, (name, description) in enumerate((
+            (BUMP_SLASH_COMMAND_NAME, "Pushes your server to the top of all your server's tags and the front page"),
+            ("invite", "Get the invite link for DISBOARD"),
+            ("page", "Get the page link of this server"),
+        ))
+    ]
+
+def _snowflake() -> int:
+    return discord.utils.time_snowflake(discord.utils.utcnow()) + random.getrandbits(22)
+
+def _response(status: int, reason: str) -> SimpleNamespace:
+    return SimpleNamespace(status=status, reason=reason)
@@ -0,0 +1,204 @@
+"""
+Replays a fleet of selfbots and servers over a simulated period, in virtual time.
+
+Run from the project root:
+
+    python -m benchmarks.simulate_schedule --hours 24
+    python -m benchmarks.simulate_schedule --servers 40 --selfbots 3
+
+By default the fleet configured in the data directory is copied, with its
+cooldowns and its order, into a temporary storage: the configuration itself is
+only read. With `--servers`, a synthetic fleet whose servers are all due is
+used instead.
+
+The real scheduler and selfbot service run against `FakeDiscord` on an event
+loop driven by a `VirtualClock`, so a day of bumping is replayed in well under a second.
+Disboard is assumed to enforce exactly the cooldowns stored for the servers.
+The report gives the predicted bump times of each server, the longest periods
+without any command sent, and how often the bump loop woke up.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rich.table import Table
+from rich import box
+
+from benchmarks.fake_discord import DISBOARD_COOLDOWN, FakeDiscord, FakeLatency
+from src.bump_scheduler import BumpScheduler
+from src.clock import VirtualClock
+from src.console import console
+from src.json_manager import DataManager
+from src.metrics import SCHEDULER_WAKEUPS
+from src.models import Selfbot, Server
+from src.storage import open_storage
+
+PROJECT_ROOT = Path(__file__).parent.parent
+# Bump times listed per server in the report
+LISTED_BUMP_TIMES = 6
+
+def load_fleet(data_dir: Path, backend: str) -> tuple[list[Selfbot], list[Server]]:
+    """Return the configured selfbots and servers, in the user's order."""
+
+    storage = open_storage(data_dir, backend)
+    try:
+        return storage.load_selfbots(), storage.load_servers()
+    finally:
+        storage.close()
+
+def synthetic_fleet(servers: int, selfbots: int) -> tuple[list[Selfbot], list[Server]]:
+    """Return a fleet whose servers and accounts are all able to bump."""
+
+    return (
+        [Selfbot(index + 1, f"token{index}", f"account{index + 1}") for index in range(selfbots)],
+        [Server(10**17 + index, f"guild{index + 1}", 10**17 + servers + index, "bump") for index in range(servers)]
+    )
+
+def populate(data_dir: Path, fake: FakeDiscord, selfbots: list[Selfbot], servers: list[Server]) -> list[Server]:
+    """
+    Register a copy of the fleet, with accounts and guilds of `fake`, in a new data directory.
+
+    Returns
+    -------
+    list[Server]
+        The copied servers, with the IDs of the fake guilds.
+    """
+
+    copies = []
+    storage = open_storage(data_dir, "sqlite")
+    with storage.transaction():
+        for selfbot in selfbots:
+            user_id, token, _ = fake.add_account(selfbot.name)
+            storage.save_selfbot(dataclasses.replace(selfbot, id=user_id, token=token))
+        for server in servers:
+            guild_id, channel_id = fake.add_guild(server.guild_name, next_bump_at=server.next_bump_timestamp)
+            if server.channel_id == -1:
+                # not bumped by the scheduler either
+                channel_id = -1
+            copy = dataclasses.replace(server, guild_id=guild_id, channel_id=channel_id)
+            storage.save_server(copy)
+            copies.append(copy)
+    storage.close()
+    return copies
+
+async def simulate(scheduler: BumpScheduler, seconds: float):
+    """Run the scheduler for `seconds` of virtual time, then shut it down."""
+
+    bumping = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(seconds)
+    scheduler.stop()
+    await bumping
+    await scheduler.close()
+
+def _format_time(timestamp: float, day: bool = False) -> str:
+    return time.strftime("%a %H:%M" if day else "%H:%M", time.localtime(timestamp))
+
+def _format_duration(seconds: float) -> str:
+    return f"{int(seconds) // 3600}h{int(seconds) % 3600 // 60:02d}"
+
+def server_table(fake: FakeDiscord, servers: list[Server], start: float) -> Table:
+    table = Table(title=f"Predicted bumps per server, from {_format_time(start, day=True)}", box=box.ROUNDED)
+    for column, style in (
+        ("Server", "blue"), ("Bumps", "green"), ("Cooldown replies", "yellow"),
+        ("Mean interval", "cyan"), ("Mean delay (s)", "magenta"), ("Bump times", "white")
+    ):
+        table.add_column(column, style=style)
+
+    for server in servers:
+        records = [record for record in fake.bumps if record.guild_id == server.guild_id]
+        bump_times = [record.received_at for record in records if record.success]
+        # delay between the end of each cooldown and the bump which followed it
+        available_at = max(start, server.next_bump_timestamp)
+        delays = []
+        for bump_time in bump_times:
+            delays.append(bump_time - available_at)
+            available_at = bump_time + DISBOARD_COOLDOWN
+        intervals = [later - earlier for earlier, later in zip(bump_times, bump_times[1:])]
+
+        listed = " ".join(_format_time(timestamp) for timestamp in bump_times[:LISTED_BUMP_TIMES])
+        if len(bump_times) > LISTED_BUMP_TIMES:
+            listed += " ..."
+        table.add_row(
+            server.guild_name, str(len(bump_times)), str(len(records) - len(bump_times)),
+            _format_duration(statistics.mean(intervals)) if intervals else "-",
+            f"{statistics.mean(delays):.1f}" if delays else "-",
+            listed or "[red]never[/]"
+        )
+    return table
+
+def gap_table(fake: FakeDiscord, start: float, end: float, count: int) -> Table:
+    """Return the longest periods during which no command was sent."""
+
+    times = [start] + [record.received_at for record in fake.bumps] + [end]
+    gaps = sorted(zip(times, times[1:]), key=lambda gap: gap[1] - gap[0], reverse=True)[:count]
+
+    table = Table(title="Longest periods without any command", box=box.ROUNDED)
+    for column, style in (("From", "cyan"), ("To", "cyan"), ("Duration", "green")):
+        table.add_column(column, style=style)
+    for earlier, later in sorted(gaps):
+        table.add_row(_format_time(earlier, day=True), _format_time(later, day=True), _format_duration(later - earlier))
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the bump schedule of a fleet in virtual time.")
+    parser.add_argument("--hours", type=float, default=24, help="simulated period (default: 24)")
+    parser.add_argument("--data-dir", default="data", help="the data directory, relative to the project root (default: data)")
+    parser.add_argument("--storage", choices=("sqlite", "json"), default="sqlite", help="the storage backend (default: sqlite)")
+    parser.add_argument("--servers", type=int, help="simulate this many synthetic servers instead of the configured ones")
+    parser.add_argument("--selfbots", type=int, default=1, help="accounts of the synthetic fleet (default: 1)")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds of each simulated Discord delay (default: 0.5)")
+    parser.add_argument("--gaps", type=int, default=5, help="idle gaps listed (default: 5)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('discord').setLevel(logging.ERROR)
+
+    if args.servers is not None:
+        selfbots, servers = synthetic_fleet(args.servers, args.selfbots)
+    else:
+        data_dir = PROJECT_ROOT / args.data_dir
+        if not data_dir.is_dir():
+            console.print(f"[red]No data directory at {data_dir}, use --servers to simulate a synthetic fleet.[/]")
+            sys.exit(1)
+        selfbots, servers = load_fleet(data_dir, args.storage)
+    if not selfbots or not servers:
+        console.print("[red]The fleet needs at least one selfbot and one server.[/]")
+        sys.exit(1)
+
+    clock = VirtualClock(time.time())
+    start = clock.time()
+    end = start + args.hours * 3600
+    latency = FakeLatency(connect=args.latency, rest=args.latency, acknowledge=args.latency, reply=args.latency)
+    fake = FakeDiscord(latency, clock=clock)
+    wakeups_before = {cause: SCHEDULER_WAKEUPS.value(cause) for cause in ("deadline", "change")}
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        copies = populate(Path(directory), fake, selfbots, servers)
+        data_manager = DataManager(directory, "sqlite", client_factory=fake.client_factory, clock=clock)
+        scheduler = BumpScheduler(data_manager)
+        # a simulation must not take the port and the socket of a running instance
+        scheduler.metrics_server = None
+        scheduler.control_server = None
+        clock.run(simulate(scheduler, end - start))
+    elapsed = time.perf_counter() - started
+
+    console.print(server_table(fake, copies, start))
+    console.print(gap_table(fake, start, end, args.gaps))
+    wakeups = {cause: SCHEDULER_WAKEUPS.value(cause) - value for cause, value in wakeups_before.items()}
+    console.print(
+        f"{args.hours:g}h simulated in {elapsed * 1000:.0f} ms: {len(servers)} servers, {len(selfbots)} selfbots, "
+        f"{len(fake.bumps)} commands sent, {sum(record.success for record in fake.bumps)} bumps.\n"
+        f"Scheduler wake-ups: {wakeups['deadline']:.0f} on a deadline, {wakeups['change']:.0f} on a schedule change "
+        f"({sum(wakeups.values()) / args.hours:.1f}/h). Event loop timer jumps: {clock.jumps}."
+    )
+
+if __name__ == "__main__":
+    main()
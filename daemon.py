@@ -0,0 +1,111 @@
+"""
+Runs the auto-bumper without the interactive interface, under a process supervisor.
+
+    python daemon.py [--data-dir data] [--storage sqlite] [--shutdown-timeout 20]
+
+The logs are written as plain text or JSON lines, to stderr or to a file rotated
+by size (`--log-format json --log-file data/logs/autobumper.log`). They are
+written by a background thread, so logging never blocks the bump loop. Signals
+control the process:
+
+* SIGTERM or SIGINT: finish the current bump attempt, close the sessions and
+  exit, within the shutdown timeout;
+* SIGHUP: read the selfbots and servers again from the storage, for example
+  after `servers.json` or `selfbots.json` were edited with `--storage json`.
+  Prefer the control API (`python main.py control ...`) to change the
+  configuration of a running daemon.
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+import signal
+import sys
+
+from src.bump_scheduler import SHUTDOWN_TIMEOUT, BumpScheduler
+from src.json_manager import DataManager
+from src.logging_setup import LogPipeline, build_handler
+
+logger = logging.getLogger("daemon")
+
+async def run_daemon(scheduler: BumpScheduler, shutdown_timeout: float) -> int:
+    """
+    Run the scheduler until a stop signal, then shut it down. Return the exit code.
+
+    The current bump attempt and the closing of the sessions share the shutdown
+    timeout. The exit code is 1 if the loop crashed or if something could not be
+    closed in time.
+    """
+
+    loop = asyncio.get_running_loop()
+    stop_requested = asyncio.Event()
+    reloads: set[asyncio.Task] = set()
+
+    def reload():
+        logger.info("SIGHUP received, reloading the configuration...")
+        task = asyncio.create_task(scheduler.reload())
+        # keep a reference until the reload is done
+        reloads.add(task)
+        task.add_done_callback(reloads.discard)
+
+    handlers = {signal.SIGTERM: stop_requested.set, signal.SIGINT: stop_requested.set}
+    if hasattr(signal, "SIGHUP"):
+        handlers[signal.SIGHUP] = reload
+    for signal_number, handler in handlers.items():
+        try:
+            loop.add_signal_handler(signal_number, handler)
+        except NotImplementedError:
+            logger.warning(f"{signal.Signals(signal_number).name} can't be handled on this platform.")
+
+    bumping = asyncio.create_task(scheduler.run())
+    stopping = asyncio.create_task(stop_requested.wait())
+    await asyncio.wait((bumping, stopping), return_when=asyncio.FIRST_COMPLETED)
+    stopping.cancel()
+
+    exit_code = 0
+    deadline = loop.time() + shutdown_timeout
+    if bumping.done():
+        # the loop only returns on a stop, so it crashed
+        logger.error("The bump loop stopped unexpectedly.", exc_info=bumping.exception())
+        exit_code = 1
+    else:
+        logger.info(f"Shutting down, waiting up to {shutdown_timeout}s...")
+        scheduler.stop()
+        try:
+            await asyncio.wait_for(bumping, max(0, deadline - loop.time()))
+        except TimeoutError:
+            logger.warning("The current bump attempt did not finish in time, it was cancelled.")
+
+    if not await scheduler.close(max(0, deadline - loop.time())):
+        exit_code = 1
+    logger.info(f"Stopped. {scheduler.bump_count} bumps sent this session.")
+    return exit_code
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the auto-bumper without the interactive interface.")
+    parser.add_argument("--data-dir", default="data", help="the data directory, relative to the project root (default: data)")
+    parser.add_argument("--storage", choices=("sqlite", "json"), default="sqlite", help="the storage backend (default: sqlite)")
+    parser.add_argument(
+        "--shutdown-timeout", type=float, default=SHUTDOWN_TIMEOUT,
+        help=f"seconds allowed for the graceful shutdown (default: {SHUTDOWN_TIMEOUT})"
+    )
+    parser.add_argument("--log-format", choices=("plain", "json"), default="plain", help="the format of the log lines (default: plain)")
+    parser.add_argument("--log-file", type=Path, help="write the logs to this file, rotated by size, instead of stderr")
+    args = parser.parse_args()
+
+    log_pipeline = LogPipeline([build_handler(args.log_format, args.log_file)])
+    log_pipeline.start()
+    logging.getLogger('discord').setLevel(logging.ERROR)
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    data_manager = DataManager(args.data_dir, args.storage)
+    scheduler = BumpScheduler(data_manager)
+    exit_code = asyncio.run(run_daemon(scheduler, args.shutdown_timeout))
+    log_pipeline.stop()
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
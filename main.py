@@ -1,29 +1,77 @@
+import argparse
 import asyncio
+import atexit
 import logging
+from pathlib import Path
 import sys
-import time
-import rich.text
-import rich.panel
 
 from rich.logging import RichHandler
 
-from src.bump_scheduler import BumpScheduler
 from src.console import console
-import src.json_manager as json_manager
+from src.logging_setup import LogPipeline
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[
-        RichHandler(
-            show_path=False,
-            rich_tracebacks=True,
-            omit_repeated_times=False,
-            console=console
-        )
-    ]
+parser = argparse.ArgumentParser(description="Automate bumping your Discord servers on Disboard.")
+parser.add_argument(
+    "--storage", choices=("sqlite", "json"), default="sqlite",
+    help="the storage backend; with json, hand edits of the data files are applied while running (default: sqlite)"
+)
+subcommands = parser.add_subparsers(dest="command")
+trace_summary_parser = subcommands.add_parser(
+    "trace-summary", help="print the p50/p95/p99 latencies of the traced bumps, per phase and per server"
+)
+trace_summary_parser.add_argument(
+    "--file", type=Path, default=Path(__file__).parent / "data" / "traces" / "bumps.jsonl",
+    help="the trace file, its rotated backups are read too (default: data/traces/bumps.jsonl)"
+)
+trace_summary_parser.add_argument("--server", type=int, help="only summarize the bumps of this server ID")
+history_parser = subcommands.add_parser(
+    "history", help="print the success rate and the mean latency of each server over the last days"
 )
+history_parser.add_argument(
+    "--file", type=Path, default=Path(__file__).parent / "data" / "history.db",
+    help="the history database (default: data/history.db)"
+)
+history_parser.add_argument("--days", type=float, default=7, help="the length of the period (default: 7)")
+history_parser.add_argument("--server", type=int, help="only summarize this server ID")
+control_parser = subcommands.add_parser("control", help="change the configuration of the running auto-bumper loop")
+control_parser.add_argument(
+    "--socket", type=Path, default=Path(__file__).parent / "data" / "control.sock",
+    help="the control socket of the running instance (default: data/control.sock)"
+)
+actions = control_parser.add_subparsers(dest="action", required=True)
+actions.add_parser("status", help="show the accounts and the schedule")
+actions.add_parser("reload", help="apply the changes made to the data files")
+actions.add_parser("register-selfbot", help="register an account, its token is asked for")
+actions.add_parser("remove-selfbot", help="remove an account").add_argument("selfbot_id", type=int)
+register_server_parser = actions.add_parser("register-server", help="register a server")
+register_server_parser.add_argument("guild_id", type=int)
+register_server_parser.add_argument("channel_id", type=int)
+actions.add_parser("remove-server", help="remove a server").add_argument("guild_id", type=int)
+set_channel_parser = actions.add_parser("set-channel", help="change the bump channel of a server")
+set_channel_parser.add_argument("guild_id", type=int)
+set_channel_parser.add_argument("channel_id", type=int)
+set_metadata_ttl_parser = actions.add_parser(
+    "set-metadata-ttl", help="set the seconds between two refreshes of the names of a server"
+)
+set_metadata_ttl_parser.add_argument("guild_id", type=int)
+set_metadata_ttl_parser.add_argument("seconds", type=int)
+actions.add_parser("reorder", help="set the order of the servers").add_argument("guild_ids", type=int, nargs="+")
+actions.add_parser(
+    "import-servers", help="register the servers of a CSV or JSON file of server and channel IDs"
+).add_argument("file", type=Path)
+args = parser.parse_args()
+
+rich_handler = RichHandler(
+    show_path=False,
+    rich_tracebacks=True,
+    omit_repeated_times=False,
+    console=console
+)
+rich_handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+# the records are rendered by a background thread, off the bump path
+log_pipeline = LogPipeline([rich_handler])
+log_pipeline.start()
+atexit.register(log_pipeline.stop)
 
 logging.getLogger('discord').setLevel(logging.ERROR)
 logging.getLogger('discord.http').setLevel(logging.ERROR)
@@ -34,6 +82,69 @@ logging.getLogger('discord.gateway').setLevel(logging.ERROR)
 if sys.platform == "win32": 
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+if args.command == "trace-summary":
+    from src.tracing import display_trace_summary
+
+    display_trace_summary(args.file, args.server)
+    sys.exit(0)
+
+if args.command == "history":
+    from src.bump_history import display_history
+
+    display_history(args.file, args.days, args.server)
+    sys.exit(0)
+
+if args.command == "control":
+    from src.control import CLIENT_TIMEOUT, ControlError, display_status, send_request
+
+    requests = {
+        "status": ("status", {}),
+        "reload": ("reload", {}),
+        "register-selfbot": ("register_selfbot", {}),
+        "remove-selfbot": ("remove_selfbot", {"SelfbotId": getattr(args, "selfbot_id", None)}),
+        "register-server": ("register_server", {"GuildId": getattr(args, "guild_id", None), "ChannelId": getattr(args, "channel_id", None)}),
+        "remove-server": ("remove_server", {"GuildId": getattr(args, "guild_id", None)}),
+        "set-channel": ("set_channel", {"GuildId": getattr(args, "guild_id", None), "ChannelId": getattr(args, "channel_id", None)}),
+        "set-metadata-ttl": ("set_metadata_ttl", {"GuildId": getattr(args, "guild_id", None), "Seconds": getattr(args, "seconds", None)}),
+        "reorder": ("reorder_servers", {"GuildIds": getattr(args, "guild_ids", None)}),
+        "import-servers": ("import_servers", {}),
+    }
+    command, arguments = requests[args.action]
+    timeout = CLIENT_TIMEOUT
+    if command == "register_selfbot":
+        # not an argument, it would be kept in the shell history
+        arguments["Token"] = console.input("Account token: ", password=True)
+    if command == "import_servers":
+        from src.server_import import ImportRow, display_import_report, read_import_file
+
+        try:
+            rows = read_import_file(args.file)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Error:[/] could not read {args.file}: {e}")
+            sys.exit(1)
+        arguments["Servers"] = [row.to_dict() for row in rows]
+        # the names are resolved a few at a time
+        timeout += len(rows)
+    try:
+        result = send_request(args.socket, command, arguments, timeout)
+    except ControlError as e:
+        console.print(f"[red]Error:[/] {e}")
+        sys.exit(1)
+    if command == "status":
+        display_status(result)
+    elif command == "import_servers":
+        display_import_report([ImportRow.from_dict(row) for row in result])
+    else:
+        console.print("[green]Done.[/]" if result is None else f"[green]Done:[/] {result}")
+    sys.exit(0)
+
+# imported after the arguments are parsed, so that the subcommands start faster
+import rich.text
+import rich.panel
+
+from src.bump_scheduler import BumpScheduler
+import src.json_manager as json_manager
+
 with console.screen():
     welcome_text = rich.text.Text()
     welcome_text.append("Welcome !\n", style="bold purple")
@@ -47,7 +158,12 @@ with console.screen():
         padding=(1, 2)
     )
     console.print(banner)
-    time.sleep(0.4)
-    data_manager = json_manager.DataManager()
+    data_manager = json_manager.DataManager(storage_backend=args.storage)
     bmp = BumpScheduler(data_manager)
-    bmp.loop()
+    clean_exit = bmp.loop()
+    # the last logs belong to the screen being left
+    log_pipeline.flush()
+
+# printed once back on the main screen, where it stays visible
+console.print(f"Goodbye ! {bmp.bump_count} bump sent this session.")
+sys.exit(0 if clean_exit else 1)
@@ -1,12 +1,18 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import datetime
 import logging
-import sys
+import time
 import discord
 import asyncio
-import threading
-from typing import Optional
-
-from src.disboard_embed_decoder import *
+from typing import Callable, Optional
+
+from src.clock import SYSTEM_CLOCK, Clock
+from src.command_cache import CommandCache
+from src.disboard_embed_decoder import BumpReplyKind, decode_bump_reply
+from src.metrics import (
+    COMMAND_LOOKUP_SECONDS, COMMAND_LOOKUPS, COMMAND_SEND_SECONDS, CONNECT_SECONDS, RESPONSE_WAIT_SECONDS
+)
+from src.tracing import BumpSpan
 from src.console import console
 
 logger = logging.getLogger(__name__)
@@ -14,18 +20,76 @@ logger = logging.getLogger(__name__)
 DISBOARD_APPLICATION_ID = 302050872383242240
 BUMP_SLASH_COMMAND_NAME = "bump"
 DISBOARD_BOT_ID = 302050872383242240
+# Seconds before a request to Discord is abandoned
+REQUEST_TIMEOUT = 10
+# Tolerated clock difference, in seconds, between this computer and Discord
+CLOCK_SKEW_TOLERANCE = 2
+# Seconds between two bumps of a server, enforced by Disboard
+DISBOARD_BUMP_COOLDOWN = 2 * 3600
 
 @dataclass
 class BumpResult:
-    success: bool
-    next_bump_delay_minutes: int
+    """
+    The reply of Disboard to a bump command.
+
+    Attributes
+    ----------
+    kind : BumpReplyKind
+        SUCCESS, COOLDOWN, or UNKNOWN if the reply could not be understood,
+        e.g. when the server is not listed on Disboard.
+    next_bump_delay_seconds : int or None
+        The seconds before the server can be bumped again, None for an UNKNOWN reply.
+    reply : str
+        The text of the reply.
+    """
+
+    kind: BumpReplyKind
+    next_bump_delay_seconds: Optional[int] = None
+    reply: str = ""
+
+    @property
+    def success(self) -> bool:
+        return self.kind is BumpReplyKind.SUCCESS
+
+@dataclass(eq=False)
+class PendingBump:
+    """
+    A /bump command sent and waiting for the reply of Disboard.
+
+    Attributes
+    ----------
+    channel_id : int
+        The ID of the channel where the command was sent.
+    min_message_id : int
+        Replies with a lower snowflake were sent before the command, they
+        belong to a previous attempt.
+    interaction_id : int or None
+        The ID of the interaction, once Discord acknowledged the command.
+    future : asyncio.Future
+        Resolved with the BumpResult when the matching reply is received.
+    """
+
+    channel_id: int
+    min_message_id: int
+    interaction_id: Optional[int] = None
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def matches(self, message: discord.Message) -> bool:
+        """Check if a Disboard reply answers this command."""
+
+        if message.id < self.min_message_id:
+            return False
+        interaction = message.interaction
+        if self.interaction_id is not None and interaction is not None:
+            return interaction.id == self.interaction_id
+        return True
     
 class AutoBumpSelfbotService:
     """
-    Manages a Discord selfbot instance running in a separate background thread.
+    Manages a Discord selfbot instance running on the program's event loop.
 
-    This service provides a synchronous interface to interact with the asynchronous
-    Discord client.
+    The service must be started with `start` from a running event loop, and all
+    its methods must be awaited from that same loop.
 
     Attributes
     ----------
@@ -33,18 +97,52 @@ class AutoBumpSelfbotService:
         The Discord client instance.
     token : str
         The authentication token for the selfbot.
-    listening_channel_id : int
-        The ID of the channel where the bot expects a response from Disboard.
     """
 
-    def __init__(self, token: str, connection_timeout: int = 30):
+    def __init__(
+        self,
+        token: str,
+        command_cache: Optional[CommandCache] = None,
+        client_factory: Optional[Callable[[], discord.Client]] = None,
+        clock: Optional[Clock] = None
+    ):
         """
-        Initialize the selfbot service and start the background thread.
+        Initialize the selfbot service without connecting it.
 
         Parameters
         ----------
         token : str
             The user token to authenticate with Discord.
+        command_cache : CommandCache, optional
+            The cache of resolved /bump commands, shared with other sessions.
+            A private in-memory cache is used if not given.
+        client_factory : Callable[[], discord.Client], optional
+            Builds the Discord client, `create_client` by default. Used to run
+            the service against an offline stand-in.
+        clock : Clock, optional
+            The time source of the replies and the traces (default is `SYSTEM_CLOCK`).
+        """
+
+        self.bot = client_factory() if client_factory is not None else create_client()
+        self.token = token
+        self.command_cache = command_cache if command_cache is not None else CommandCache()
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+
+        # Event to know when the bot is ready to accept requests
+        self._is_ready = asyncio.Event()
+
+        # Commands waiting for a reply of Disboard, keyed by channel ID
+        self._pending_bumps: dict[int, PendingBump] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._register_events()
+
+    async def start(self, connection_timeout: int = 30):
+        """
+        Connect the selfbot and wait until it is ready.
+
+        Parameters
+        ----------
         connection_timeout : int, optional
             The maximum number of seconds to wait for the bot to connect
             (default is 30).
@@ -55,42 +153,28 @@ class AutoBumpSelfbotService:
             If the bot fails to connect within the timeout period.
         """
 
-        self.bot = discord.Client()
-        self.token = token
-        self.listening_channel_id = -1
-        
-        # Event to know when the bot is ready to accept requests
-        self._is_ready = threading.Event()
-
-        # Event to know when the bot see a bump response
-        self._bump_response_event = threading.Event()
-        self._last_bump_result: Optional[BumpResult] = None
-
-        # Thread configuration
-        if sys.platform == "win32":
-            self._loop = asyncio.WindowsSelectorEventLoopPolicy().new_event_loop()
-        else:
-            self._loop = asyncio.new_event_loop()
-        self._thread = threading.Thread(target=self._run_bot, daemon=True)
-
-        # Start the bot
-        self._thread.start()
+        started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run_bot())
 
         logger.info("Waiting for Discord connection...")
-        connected = self._is_ready.wait(timeout=connection_timeout)
-        if not connected:
-            raise Exception("Timeout: Could not connect to Discord. Check token or internet connection.")
-        else:
-            logger.info("DiscordService is ready!")
-
-    def _run_bot(self):
-        """
-        Run the bot's event loop in the background thread.
+        ready = asyncio.create_task(self._is_ready.wait())
+        try:
+            # the bot task ends early when the login fails, e.g. with an invalid token
+            await asyncio.wait((ready, self._task), timeout=connection_timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ready.cancel()
+        if not self._is_ready.is_set():
+            timed_out = not self._task.done()
+            await self.stop()
+            if timed_out:
+                raise Exception("Timeout: Could not connect to Discord. Check token or internet connection.")
+            raise Exception("Could not connect to Discord. Check token or internet connection.")
+        CONNECT_SECONDS.observe(time.perf_counter() - started_at)
 
-        This handles the 'on_ready' and 'on_message' events.
-        """
+        logger.info("DiscordService is ready!")
 
-        asyncio.set_event_loop(self._loop)
+    def _register_events(self):
+        """Register the 'on_ready' and 'on_message' events of the bot."""
 
         @self.bot.event
         async def on_ready():
@@ -100,7 +184,12 @@ class AutoBumpSelfbotService:
 
         @self.bot.event
         async def on_message(message: discord.Message):
-            if message.channel.id != self.listening_channel_id or message.author.id != DISBOARD_BOT_ID:
+            if message.author.id != DISBOARD_BOT_ID:
+                return
+
+            pending = self._pending_bumps.get(message.channel.id)
+            if pending is None or pending.future.done() or not pending.matches(message):
+                # no request in flight, or a late reply to a previous attempt
                 return
             
             interaction = message.interaction
@@ -116,67 +205,37 @@ class AutoBumpSelfbotService:
 
             embeds = message.embeds
             if embeds:
-                embed = embeds[0]
-                result = None
-                if is_success_embed(embed, guild.id):
-                    result = BumpResult(success=True, next_bump_delay_minutes=120)
+                # Disboard gives the time of the next bump in system time
+                reply = decode_bump_reply(embeds[0], guild.id, self.clock.to_wall(self.clock.time()))
+                text = embeds[0].description or ""
+                if reply.kind is BumpReplyKind.SUCCESS:
+                    result = BumpResult(reply.kind, DISBOARD_BUMP_COOLDOWN, text)
+                elif reply.kind is BumpReplyKind.COOLDOWN:
+                    result = BumpResult(reply.kind, reply.cooldown_seconds, text)
                 else:
-                    remaining_time = find_time_left(embed)
-                    result = BumpResult(success=False, next_bump_delay_minutes=remaining_time)
+                    logger.warning(f"Unknown reply of Disboard: {text!r}")
+                    result = BumpResult(reply.kind, reply=text)
 
-                if result is not None:
-                    self._last_bump_result = result
-                    self._bump_response_event.set()
+                pending.future.set_result(result)
+
+    async def _run_bot(self):
+        """Run the bot until it is closed."""
 
         try:
-            # We start the selfbot
-            self._loop.run_until_complete(self.bot.start(self.token))
+            await self.bot.start(self.token)
         except asyncio.CancelledError:
             pass
-        except OSError as e:
-            if e.winerror == 10038:
-                pass
-            else:
-                logger.error(f"OSError in selfbot execution: {e}")
         except Exception as e:
             logger.error(f"Error in selfbot execution: {e}")
-        finally:
-            self._cleanup_loop()
-
-    def _cleanup_loop(self):
-        """Cancel all pending tasks and close the asyncio loop safely."""
-        try:
-            if self._loop.is_closed():
-                return
-
-            pending = asyncio.all_tasks(self._loop)
-            for task in pending:
-                task.cancel()
-            
-            if pending:
-                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-            
-            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
-
-            self._loop.close()
-            logger.info("Bot thread cleaned up and closed.")
-
-        except OSError as e:
-            if e.winerror == 10038:
-                pass
-            else:
-                logger.error(f"OSError during cleanup: {e}")
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
 
-    def _execute_async(self, coro):
+    async def _execute(self, coro):
         """
-        Helper to run a coroutine in the bot's loop and wait for the result synchronously.
+        Helper to run a request of the bot with a timeout.
 
         Parameters
         ----------
         coro : Coroutine
-            The coroutine to execute in the bot's event loop.
+            The coroutine to execute.
 
         Returns
         -------
@@ -190,21 +249,38 @@ class AutoBumpSelfbotService:
         """
 
         if not self._is_ready.is_set():
+            coro.close()
             raise Exception("Selbot is not ready yet.")
-            
-        # Submit the task to the bot's loop
-        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        
+
         try:
-            # Wait for the result (blocking call)
-            return future.result(timeout=10)
+            return await asyncio.wait_for(coro, timeout=REQUEST_TIMEOUT)
         except Exception as e:
+            if _current_task_cancelling():
+                # discord.py-self wraps the cancellation of an interaction in InvalidData
+                raise asyncio.CancelledError() from e
             logger.error(f"Request failed: {e}")
             return None
 
 #   ---------------------------- Public Methods --------------------------------
 
-    def get_guild_name(self, guild_id: int) -> Optional[str]:
+    def is_alive(self) -> bool:
+        """
+        Check if the selfbot is still connected and able to accept requests.
+
+        Returns
+        -------
+        bool
+            True if the bot task runs a connected client, False otherwise.
+        """
+
+        return (
+            self._is_ready.is_set()
+            and self._task is not None
+            and not self._task.done()
+            and not self.bot.is_closed()
+        )
+
+    async def get_guild_name(self, guild_id: int) -> Optional[str]:
         """
         Retrieve the name of a specific guild (server).
 
@@ -230,9 +306,9 @@ class AutoBumpSelfbotService:
             except (discord.NotFound, discord.Forbidden):
                 return None
         
-        return self._execute_async(task())
+        return await self._execute(task())
 
-    def get_channel_name(self, channel_id: int) -> Optional[str]:
+    async def get_channel_name(self, channel_id: int) -> Optional[str]:
         """
         Retrieve the name of a specific channel.
 
@@ -258,9 +334,9 @@ class AutoBumpSelfbotService:
             except Exception:
                 return None
         
-        return self._execute_async(task())
+        return await self._execute(task())
     
-    def get_account_id_and_name(self) -> Optional[tuple[int, str]]:
+    async def get_account_id_and_name(self) -> Optional[tuple[int, str]]:
         """
         Retrieve the ID and username of the current selfbot account.
 
@@ -275,88 +351,219 @@ class AutoBumpSelfbotService:
             if user is not None:
                 return (user.id, user.name)
         
-        return self._execute_async(task())
+        return await self._execute(task())
     
-    def bump_server(self, channel_id: int) -> bool:
+    async def bump_server(self, channel_id: int, span: Optional[BumpSpan] = None) -> Optional[PendingBump]:
         """
         Trigger the Disboard /bump command in the specified channel.
 
+        Several channels can have a command in flight at the same time. A new
+        command in a channel replaces the previous one of that channel.
+
         Parameters
         ----------
         channel_id : int
             The ID of the channel where the command should be sent.
+        span : BumpSpan, optional
+            Records the "channel_lookup", "command_lookup" and "send" phases.
 
         Returns
         -------
-        bool
-            True if the command was successfully triggered, False otherwise.
+        PendingBump or None
+            The handle to pass to `wait_for_bump_result`, or None if the command
+            could not be triggered.
         """
 
-        # reset result before sending
-        self._bump_response_event.clear()
-        self._last_bump_result = None
-
         async def task() -> bool:
-            channel = await self.bot.fetch_channel(channel_id)
-            if isinstance(channel, discord.TextChannel):
+            with span.phase("channel_lookup"):
+                # the gateway cache avoids a REST round trip for known channels
+                channel = self.bot.get_channel(channel_id)
+                if channel is None:
+                    channel = await self.bot.fetch_channel(channel_id)
+                if not isinstance(channel, discord.TextChannel):
+                    return False
+                cached_command = self._get_cached_command(channel)
+
+            if cached_command is not None:
+                COMMAND_LOOKUPS.inc("hit")
+                try:
+                    with COMMAND_SEND_SECONDS.time(), span.phase("send"):
+                        interaction = await cached_command.__call__(channel=channel)
+                    pending.interaction_id = interaction.id
+                    return True
+                except discord.HTTPException as e:
+                    # the command was rejected, it may have been updated or removed
+                    logger.warning(f"Cached {BUMP_SLASH_COMMAND_NAME} command failed ({e}), resolving it again.")
+                    self.command_cache.invalidate(channel_id)
+
+            COMMAND_LOOKUPS.inc("miss")
+            with COMMAND_LOOKUP_SECONDS.time(), span.phase("command_lookup"):
+                target_command = await self._resolve_command(channel)
+            if target_command is None:
+                return False
 
-                command_list = [
-                    cmd for cmd in await channel.application_commands() 
-                    if cmd.name == BUMP_SLASH_COMMAND_NAME and cmd.application_id == DISBOARD_APPLICATION_ID
-                ]
+            try:
+                with COMMAND_SEND_SECONDS.time(), span.phase("send"):
+                    interaction = await target_command.__call__(channel=channel)
+            except Exception:
+                self.command_cache.invalidate(channel_id)
+                raise
+            pending.interaction_id = interaction.id
+            return True
+
+        if span is None:
+            span = BumpSpan(clock=self.clock)
+        sent_after = discord.utils.utcnow() - datetime.timedelta(seconds=CLOCK_SKEW_TOLERANCE)
+        pending = PendingBump(channel_id, discord.utils.time_snowflake(sent_after))
+        self._replace_pending_bump(pending)
+
+        res = await self._execute(task())
+        if res is not True:
+            self._discard_pending_bump(pending)
+            return None
+        return pending
 
-                if not command_list:
-                    logger.error(f"Command {BUMP_SLASH_COMMAND_NAME} (ID: {DISBOARD_APPLICATION_ID}) not found.")
-                    return False
+    def _replace_pending_bump(self, pending: PendingBump):
+        previous = self._pending_bumps.get(pending.channel_id)
+        if previous is not None:
+            previous.future.cancel()
+        self._pending_bumps[pending.channel_id] = pending
 
-                target_command = command_list[0]
+    def _discard_pending_bump(self, pending: PendingBump):
+        if self._pending_bumps.get(pending.channel_id) is pending:
+            del self._pending_bumps[pending.channel_id]
+        pending.future.cancel()
 
-                self.listening_channel_id = channel_id
-                await target_command.__call__(channel=channel)
-                return True
+    def _get_cached_command(self, channel: discord.TextChannel) -> Optional[discord.SlashCommand]:
+        """Rebuild the cached /bump command of a channel without any request."""
 
-            return False
+        data = self.command_cache.get(channel.id)
+        if data is None:
+            return None
+        return discord.SlashCommand(state=self.bot._connection, data=data, channel=channel) # type: ignore
 
-        res = self._execute_async(task())
-        return res if isinstance(res, bool) else False
+    async def _resolve_command(self, channel: discord.TextChannel) -> Optional[discord.SlashCommand]:
+        """Look up the /bump command of a channel and cache it."""
+
+        command_list = [
+            cmd for cmd in await channel.application_commands() 
+            if cmd.name == BUMP_SLASH_COMMAND_NAME and cmd.application_id == DISBOARD_APPLICATION_ID
+        ]
+
+        if not command_list:
+            logger.error(f"Command {BUMP_SLASH_COMMAND_NAME} (ID: {DISBOARD_APPLICATION_ID}) not found.")
+            return None
+
+        target_command = command_list[0]
+        if isinstance(target_command, discord.SlashCommand):
+            self.command_cache.put(channel.id, target_command._data) # type: ignore
+        return target_command # type: ignore
     
 
-    def wait_for_bump_result(self, timeout: int = 10) -> Optional[BumpResult]:
+    async def wait_for_bump_result(self, pending: PendingBump, timeout: float = 10) -> Optional[BumpResult]:
         """
-        Block execution until on_message receives the result or timeout occurs.
+        Wait until on_message receives the reply to a command or timeout occurs.
+
+        Parameters
+        ----------
+        pending : PendingBump
+            The handle returned by `bump_server`.
+        timeout : float, optional
+            The maximum number of seconds to wait (default is 10).
+
+        Returns
+        -------
+        Optional[BumpResult]
+            The result, or None if no reply was received in time. Replies
+            received after that are dropped.
         """
-        is_set = self._bump_response_event.wait(timeout=timeout)
-        
-        if is_set:
-            return self._last_bump_result
-        else:
+
+        started_at = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(pending.future, timeout=timeout)
+            RESPONSE_WAIT_SECONDS.observe(time.perf_counter() - started_at)
+            return result
+        except TimeoutError:
+            RESPONSE_WAIT_SECONDS.observe(time.perf_counter() - started_at)
             logger.warning("Timed out waiting for Disboard response.")
             return None
+        except asyncio.CancelledError:
+            if pending.future.cancelled() and not _current_task_cancelling():
+                # replaced by a newer command in the same channel
+                return None
+            raise
+        finally:
+            self._discard_pending_bump(pending)
 
 
-    def stop(self):
+    async def stop(self):
         """
         Stop the selfbot gracefully.
 
-        Closes the Discord connection, terminates the event loop, and
-        joins the background thread.
+        Closes the Discord connection and waits for the bot task to finish.
         """
 
-        if not self._is_ready.is_set():
+        if self._task is None:
             return
 
         logger.info("Stopping bot...")
-        
-        # Ask the bot to close himself
-        future = asyncio.run_coroutine_threadsafe(self.bot.close(), self._loop)
-        
+
         try:
-            # Wait for confirmation
-            future.result(timeout=10)
+            # Ask the bot to close himself
+            await asyncio.wait_for(self.bot.close(), timeout=REQUEST_TIMEOUT)
         except Exception as e:
             logger.warning(f"Error closing bot gracefully: {repr(e)}")
 
-        # Now that the bot has finished its 'start()' function, the thread will arrive
-        # in the 'finally' block of _run_bot and terminate. We can join it.
-        self._thread.join(timeout=5)
+        # Once closed, 'start()' returns and the bot task finishes
+        if not self._task.done():
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
         logger.info("Service stopped.")
+
+    def abort(self):
+        """Cancel the bot task without waiting, when `stop` took too long."""
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+def create_client() -> discord.Client:
+    """
+    Build a Discord client which keeps as little as possible in memory.
+
+    A session only needs the bump channels and the replies of Disboard, not
+    the guilds' members and messages: the message cache and the member cache
+    are disabled, members are not requested at startup, and the messages of
+    other authors are dropped before the library builds a `discord.Message`
+    for them.
+
+    Guild subscriptions are kept: without them, Discord doesn't send the
+    messages of large guilds, which would include the replies of Disboard.
+    """
+
+    client = discord.Client(
+        max_messages=None,
+        member_cache_flags=discord.MemberCacheFlags.none(),
+        chunk_guilds_at_startup=False
+    )
+    _drop_messages_from_others(client, DISBOARD_BOT_ID)
+    return client
+
+def _drop_messages_from_others(client: discord.Client, author_id: int):
+    """Only parse the MESSAGE_CREATE gateway events sent by `author_id`."""
+
+    # the gateway looks the parsers up in this dict for every event
+    parsers = client._connection.parsers
+    parse_message_create = parsers["MESSAGE_CREATE"]
+    author = str(author_id)
+
+    def parse_message_create_from_author(data: dict):
+        if data.get("author", {}).get("id") == author:
+            parse_message_create(data)
+
+    parsers["MESSAGE_CREATE"] = parse_message_create_from_author
+
+def _current_task_cancelling() -> bool:
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
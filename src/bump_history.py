@@ -0,0 +1,201 @@
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+import sqlite3
+import time
+from typing import Iterator, Optional
+
+from rich.table import Table
+from rich import box
+
+from src.console import console
+
+logger = logging.getLogger(__name__)
+
+# Name of the history database in the data directory. It is kept apart from
+# the configuration, whose external changes are detected by its version
+HISTORY_FILE_NAME = "history.db"
+# Outcomes of an attempt, stored by their index: new ones are appended
+OUTCOMES = ("success", "cooldown", "timeout", "error", "no_session", "unknown_reply")
+
+@dataclass(slots=True)
+class ServerHistory:
+    """
+    The attempts of one server over a period.
+
+    Attributes
+    ----------
+    guild_id : int
+        The ID of the server.
+    outcomes : dict[str, int]
+        The number of attempts per outcome.
+    mean_latency : float or None
+        The mean duration in seconds of the attempts answered by Disboard,
+        None if there was none.
+    """
+
+    guild_id: int
+    outcomes: dict[str, int]
+    mean_latency: Optional[float]
+
+    @property
+    def attempts(self) -> int:
+        return sum(self.outcomes.values())
+
+    @property
+    def success_rate(self) -> float:
+        return self.outcomes.get("success", 0) / self.attempts if self.attempts else 0
+
+class BumpHistory():
+    """
+    Append-only ledger of the bump attempts, in a SQLite database.
+
+    One row is written per attempt and never changed: the timestamp, the
+    server, the account, the outcome, the cooldown given by Disboard and the
+    duration of the attempt. The rows are indexed by server and time, and the
+    summaries are aggregated by SQLite, so the history is never loaded in memory.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS attempts (
+                    timestamp INTEGER NOT NULL,
+                    guild_id INTEGER NOT NULL,
+                    selfbot_id INTEGER NOT NULL,
+                    outcome INTEGER NOT NULL,
+                    cooldown INTEGER,
+                    latency_ms INTEGER
+                )
+            """)
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS attempts_by_guild ON attempts (guild_id, timestamp)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS attempts_by_time ON attempts (timestamp)")
+            self._connection = connection
+        return self._connection
+
+    def record(self, timestamp: float, guild_id: int, selfbot_id: int, outcome: str,
+               cooldown: Optional[int] = None, latency: Optional[float] = None):
+        """
+        Append one attempt to the history.
+
+        Parameters
+        ----------
+        timestamp : float
+            The start of the attempt.
+        guild_id : int
+            The ID of the server.
+        selfbot_id : int
+            The ID of the account used.
+        outcome : str
+            One of `OUTCOMES`.
+        cooldown : int, optional
+            The seconds before the next bump given by Disboard, if it replied.
+        latency : float, optional
+            The duration of the attempt in seconds.
+        """
+
+        try:
+            self._connect().execute(
+                "INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    round(timestamp), guild_id, selfbot_id, OUTCOMES.index(outcome), cooldown,
+                    round(latency * 1000) if latency is not None else None
+                )
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write the bump history to {self.path}: {e}")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+def summarize_history(path: Path, since: float, guild_id: Optional[int] = None) -> Iterator[ServerHistory]:
+    """
+    Stream the attempts of each server since a timestamp, aggregated by SQLite.
+
+    Parameters
+    ----------
+    path : Path
+        The history database, opened read-only.
+    since : float
+        The timestamp of the start of the period.
+    guild_id : int, optional
+        Only summarize this server.
+    """
+
+    # the time window is read from the timestamp index, or one server's rows
+    # from the server index: the older attempts are never scanned. "+guild_id"
+    # keeps SQLite from walking the whole server index to avoid sorting the groups
+    outcome_counts = ", ".join(f"SUM(outcome = {index})" for index in range(len(OUTCOMES)))
+    replied = f"({OUTCOMES.index('success')}, {OUTCOMES.index('cooldown')}, {OUTCOMES.index('unknown_reply')})"
+    query = f"""
+        SELECT guild_id, {outcome_counts}, AVG(CASE WHEN outcome IN {replied} THEN latency_ms END)
+        FROM attempts WHERE timestamp >= ? {{}}
+        GROUP BY +guild_id ORDER BY +guild_id
+    """
+    connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        if guild_id is None:
+            rows = connection.execute(query.format(""), (round(since),))
+        else:
+            rows = connection.execute(query.format("AND guild_id = ?"), (round(since), guild_id))
+        for row_guild_id, *counts, mean_latency_ms in rows:
+            yield ServerHistory(
+                row_guild_id,
+                {outcome: count for outcome, count in zip(OUTCOMES, counts) if count},
+                # the latency of a timeout is the timeout itself, it is left out
+                mean_latency_ms / 1000 if mean_latency_ms is not None else None
+            )
+    finally:
+        connection.close()
+
+def display_history(path: Path, days: float, guild_id: Optional[int] = None):
+    """
+    Print the success rate and the mean latency of each server over the last days.
+
+    Parameters
+    ----------
+    path : Path
+        The history database.
+    days : float
+        The length of the period.
+    guild_id : int, optional
+        Only summarize this server.
+    """
+
+    if not path.exists():
+        console.print(f"[yellow]No bump history found at {path}.[/]")
+        return
+
+    table = Table(title=f"Bump history, last {days:g} days", box=box.ROUNDED)
+    table.add_column("Server", style="cyan", no_wrap=True)
+    table.add_column("Attempts", justify="right")
+    table.add_column("Success rate", justify="right", style="green")
+    table.add_column("Mean latency (ms)", justify="right", style="magenta")
+    table.add_column("Outcomes", style="white")
+    try:
+        for server in summarize_history(path, time.time() - days * 86400, guild_id):
+            table.add_row(
+                str(server.guild_id), str(server.attempts), f"{server.success_rate:.0%}",
+                f"{server.mean_latency * 1000:.0f}" if server.mean_latency is not None else "-",
+                ", ".join(f"{outcome}: {count}" for outcome, count in sorted(server.outcomes.items()))
+            )
+    except sqlite3.Error as e:
+        console.print(f"[red]Could not read the bump history {path}: {e}[/]")
+        return
+
+    if not table.row_count:
+        console.print("[yellow]No bump attempt in this period.[/]")
+        return
+    console.print(table)
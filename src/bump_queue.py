@@ -0,0 +1,113 @@
+import asyncio
+import heapq
+import itertools
+
+class BumpQueue():
+    """
+    Min-heap of servers keyed by their next bump timestamp.
+
+    Rescheduling a server pushes a new entry and leaves the old one in the heap;
+    outdated entries are skipped when they reach the top. Ties are broken by the
+    position of the server in the user's list.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, int, int]] = []
+        self._entries: dict[int, int] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._entries
+
+    def push(self, guild_id: int, deadline: float, position: int):
+        """
+        Schedule a server, replacing its previous deadline if any.
+
+        Parameters
+        ----------
+        guild_id : int
+            The id of the server.
+        deadline : float
+            The timestamp at which the server becomes bumpable.
+        position : int
+            The position of the server in the user's list.
+        """
+
+        entry_id = next(self._counter)
+        self._entries[guild_id] = entry_id
+        heapq.heappush(self._heap, (deadline, position, entry_id, guild_id))
+        self._wakeup.set()
+
+    def remove(self, guild_id: int):
+        """Unschedule a server."""
+        if self._entries.pop(guild_id, None) is not None:
+            self._wakeup.set()
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+        self._wakeup.set()
+
+    def _drop_outdated(self):
+        while self._heap:
+            _, _, entry_id, guild_id = self._heap[0]
+            if self._entries.get(guild_id) == entry_id:
+                return
+            heapq.heappop(self._heap)
+
+    def next_deadline(self) -> float | None:
+        """Return the earliest scheduled deadline, or None if the queue is empty."""
+        self._drop_outdated()
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def pop_due(self, now: float) -> list[int]:
+        """
+        Remove and return the servers whose deadline has passed.
+
+        Parameters
+        ----------
+        now : float
+            The current timestamp.
+
+        Returns
+        -------
+        list[int]
+            The ids of the due servers, earliest deadline first.
+        """
+
+        due = []
+        while True:
+            self._drop_outdated()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, _, _, guild_id = heapq.heappop(self._heap)
+            del self._entries[guild_id]
+            due.append(guild_id)
+
+    def wake(self):
+        """Interrupt a pending wait."""
+        self._wakeup.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait until the timeout expires or the queue is changed.
+
+        Returns
+        -------
+        bool
+            True if woken up early, False if the timeout expired.
+        """
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            self._wakeup.clear()
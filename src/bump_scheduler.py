@@ -1,39 +1,97 @@
+import asyncio
 from enum import IntEnum
 import logging
-import sys
-import time
+from pathlib import Path
+import textwrap
 from rich.panel import Panel
 from rich.table import Table
 from rich import box
 from rich.prompt import Prompt
 
+from src.bump_history import HISTORY_FILE_NAME, BumpHistory
+from src.bump_queue import BumpQueue
+from src.control import CONTROL_SOCKET_NAME, ControlServer
+from src.disboard_embed_decoder import BumpReplyKind
+from src.file_watcher import FileWatcher
 from src.json_manager import DataManager
+from src.logging_setup import flush_logs
+from src.metadata_refresher import MetadataRefresher
+from src.metrics import BUMP_OUTCOMES, METRICS_PORT, REGISTRY, SCHEDULER_WAKEUPS, MetricsServer
+from src.models import SchemaError, Server
+from src.server_import import ImportRow, display_import_report, read_import_file, resolve_servers
+from src.session_pool import SessionPool
+from src.tracing import BumpSpan, TraceWriter
 from src.console import console
 
 logger = logging.getLogger(__name__)
 
+# Seconds before checking again for a selfbot when none is registered
+RETRY_DELAY = 60
+# Maximum seconds to sleep when no server is scheduled
+IDLE_WAIT = 60
+# Characters of an unknown reply of Disboard kept in the failure reason of a server
+FAILURE_REPLY_LENGTH = 120
+# Seconds allowed for closing every session at exit, after which they are abandoned
+SHUTDOWN_TIMEOUT = 20
+# Seconds a selfbot waits after a successful bump before bumping another server
+SELFBOT_COOLDOWN = 30 * 60
+
 class ProgramState(IntEnum):
     BUMPING = 0
     CONFIGURATING = 1
     EXIT = 2
 
 class BumpScheduler():
+    """
+    Runs the auto-bump loop and the config manager on a single event loop.
+
+    The bump loop is an asyncio task. The config manager is a synchronous front
+    end which runs the asynchronous operations it needs on the same loop.
+    """
+
     def __init__(self, data_manager: DataManager) -> None:
         self.bump_count = 0
+        self.clock = data_manager.clock
+        self.started_at = self.clock.time()
+        self._runner = asyncio.Runner()
         self.data_manager = data_manager
+        self.sessions = SessionPool(data_manager)
+        self.metadata_refresher = MetadataRefresher(data_manager, self.sessions)
+        self.metrics_server = MetricsServer(REGISTRY, METRICS_PORT) if METRICS_PORT is not None else None
+        self.tracer = TraceWriter(data_manager.data_dir / "traces" / "bumps.jsonl")
+        self.history = BumpHistory(data_manager.data_dir / HISTORY_FILE_NAME)
+        self.control_server = (
+            ControlServer(self, data_manager.data_dir / CONTROL_SOCKET_NAME) if CONTROL_SOCKET_NAME is not None else None
+        )
+        self.queue = BumpQueue()
+        self._positions: dict[int, int] = {}
+        self._queue_outdated = True
+        self.data_manager.add_listener(self._on_data_changed)
+        self.headless = False
+        self._bumping_with: int | None = None
+        self._outdated_sessions: set[int] = set()
         self.state = ProgramState.BUMPING
         logger.info("Starting auto-bump loop...")
 
-    def loop(self):
+    def loop(self) -> bool:
+        """
+        Alternate between the bump loop and the config manager until the user exits.
+
+        Returns
+        -------
+        bool
+            True if everything was closed cleanly at exit.
+        """
+
         while self.state != ProgramState.EXIT:
             if self.state == ProgramState.BUMPING:
                 try:
-                    self._bumping()
+                    # ctrl-c cancels the task and raises KeyboardInterrupt here
+                    self._run(self._bumping())
                 except KeyboardInterrupt:
                     console.print("\n")
                     logger.info("Switching to configuration mode...")
                     self.state = ProgramState.CONFIGURATING
-                    time.sleep(1.5)
 
             elif self.state == ProgramState.CONFIGURATING:
                 try:
@@ -42,64 +100,332 @@ class BumpScheduler():
                     console.print("\n")
                     self.state = ProgramState.EXIT
 
-        self._exit()
+        return self._exit()
 
-    def _bumping(self):
-        if not self.data_manager.selfbots or not self.data_manager.servers:
-            logger.warning("No selfbots or servers configured. Entering configuration mode.")
-            self.state = ProgramState.CONFIGURATING
-            time.sleep(3.33)
-            return
+    async def run(self):
+        """
+        Bump the servers until `stop` is called, without the config manager.
 
-        for server in self.data_manager.servers:
-            guild_id = int(server["GuildId"])
-            
-            if self.data_manager.is_server_bumpable(server):
-                logger.info(f"Server {guild_id} is bumpable. Searching for available selfbot...")
-                
-                for selfbot_id in self.data_manager.selfbots.keys():
-                    sb_id = int(selfbot_id)
-                    
-                    if self.data_manager.is_selfbot_able_to_bump(sb_id):
-                        logger.info(f"Trying to bump with selfbot {self.data_manager.selfbots[selfbot_id]["Name"]}...")
+        Used by the headless daemon. When no selfbot or server is configured,
+        the scheduler waits for a `reload` instead of opening the config manager.
+        """
 
-                        selfbot_service = self.data_manager.update_and_start_selfbot_service(sb_id)
+        self.headless = True
+        self.state = ProgramState.BUMPING
+        await self._bumping()
 
-                        if selfbot_service is not None:
-                            self.data_manager.update_server(guild_id, selfbot_service)
+    def stop(self):
+        """Make `run` return once the current bump attempt is finished."""
 
-                            logger.info(f"Sending bump command to channel {server['ChannelId']}...")
-                            selfbot_service.bump_server(int(server["ChannelId"]))
+        self.state = ProgramState.EXIT
+        self.queue.wake()
 
-                            result = selfbot_service.wait_for_bump_result(5)
-                            selfbot_service.stop()
+    async def reload(self):
+        """Apply the changes made to the storage by another program and close the outdated sessions."""
 
-                            if result:
-                                if result.success:
-                                    logger.info(f"Server bumped! Next bump in {result.next_bump_delay_minutes} min.")
-                                    self.data_manager.set_selfbot_cooldown(sb_id, 30)
-                                    self.bump_count += 1
-                                else:
-                                    logger.info(f"Bump failed. Cooldown set to {result.next_bump_delay_minutes} min.")
+        try:
+            outdated = self.data_manager.reload()
+        except SchemaError as e:
+            logger.warning(f"Configuration not reloaded, the current one is kept: {e}")
+            return
+        for selfbot_id in outdated:
+            await self._close_session(selfbot_id)
 
-                                self.data_manager.set_server_cooldown(guild_id, result.next_bump_delay_minutes)
+    async def _close_session(self, selfbot_id: int):
+        if selfbot_id == self._bumping_with:
+            # closed once its bump attempt is finished
+            self._outdated_sessions.add(selfbot_id)
+        else:
+            await self.sessions.close(selfbot_id)
+
+    def status(self) -> dict:
+        """
+        Return a snapshot of the accounts and of the schedule, built from memory only.
+        Its timestamps are in system time, for the client.
+        """
+
+        connected = self.sessions.connected_ids()
+        next_deadline = self.queue.next_deadline()
+        to_wall = self.clock.to_wall
+        return {
+            "State": self.state.name.lower(),
+            "StartedAt": to_wall(self.started_at),
+            "BumpCount": self.bump_count,
+            "NextDeadline": to_wall(next_deadline) if next_deadline is not None else None,
+            "Selfbots": [
+                {
+                    "Id": selfbot.id,
+                    "Name": selfbot.name,
+                    "Connected": selfbot.id in connected,
+                    "NextAttempt": to_wall(selfbot.next_attempt_timestamp()),
+                    "FailureCount": selfbot.failure_count,
+                    "FailureReason": selfbot.failure_reason
+                }
+                for selfbot in self.data_manager.selfbots.values()
+            ],
+            "Servers": [
+                {
+                    "GuildId": server.guild_id,
+                    "GuildName": server.guild_name,
+                    "ChannelId": server.channel_id,
+                    "ChannelName": server.channel_name,
+                    "NextAttempt": to_wall(server.next_attempt_timestamp()),
+                    "FailureCount": server.failure_count,
+                    "FailureReason": server.failure_reason
+                }
+                for server in self.data_manager.servers.values()
+            ]
+        }
+
+    async def close(self, timeout: float | None = None) -> bool:
+        """
+        Close the sessions, then flush and close the trace file, the history and the storage.
+
+        The sessions are closed at the same time, under a single deadline. The
+        files are closed even if some sessions were abandoned.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum seconds to wait for the sessions. The ones still open after
+            it are abandoned.
+
+        Returns
+        -------
+        bool
+            True if every session closed in time and every file was flushed.
+        """
+
+        clean = True
+        abandoned = await self.sessions.close_all(timeout)
+        if abandoned:
+            selfbots = self.data_manager.selfbots
+            names = ", ".join(selfbots[selfbot_id].name if selfbot_id in selfbots else str(selfbot_id) for selfbot_id in abandoned)
+            logger.warning(f"{len(abandoned)} sessions not closed after {timeout}s, abandoned: {names}.")
+            clean = False
+
+        for name, close in (("trace file", self.tracer.close), ("bump history", self.history.close), ("storage", self.data_manager.close)):
+            try:
+                close()
+            except Exception as e:
+                logger.error(f"Could not close the {name}: {e}")
+                clean = False
+        return clean
+
+    def _run(self, coro):
+        """Run a coroutine on the program's event loop and return its result."""
+        return self._runner.run(coro)
+
+    def _on_data_changed(self, guild_id: int | None):
+        if guild_id is None:
+            self._queue_outdated = True
+            self.queue.wake()
+            return
 
-                                if result.success:
-                                    break # move to next server
-                            else:
-                                logger.warning("No result received from Discord.")
+        server = self.data_manager.get_server(guild_id)
+        if server is None:
+            self.queue.remove(guild_id)
+            return
+
+        position = self._positions.setdefault(guild_id, len(self._positions))
+        self.queue.push(guild_id, server.next_attempt_timestamp(), position)
+
+    def _rebuild_queue(self):
+        self.queue.clear()
+        self._positions = {}
+        for position, server in enumerate(self.data_manager.servers.values()):
+            guild_id = server.guild_id
+            self._positions[guild_id] = position
+            self.queue.push(guild_id, server.next_attempt_timestamp(), position)
+        self._queue_outdated = False
+
+    async def _bumping(self):
+        # names are refreshed in the background, outside the bump path
+        background = [
+            asyncio.create_task(self.metadata_refresher.run()),
+            asyncio.create_task(self._watch_storage())
+        ]
+        if self.metrics_server is not None:
+            background.append(asyncio.create_task(self.metrics_server.serve()))
+        if self.control_server is not None:
+            background.append(asyncio.create_task(self.control_server.serve()))
+        try:
+            await self._bump_loop()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+
+    async def _watch_storage(self):
+        """Reload the configuration whenever another program changes the storage."""
+
+        watcher = FileWatcher(self.data_manager.watched_paths())
+        try:
+            while True:
+                if self.data_manager.changed_externally():
+                    await self.reload()
+                await watcher.wait()
+        finally:
+            watcher.close()
+
+    async def _bump_loop(self):
+        idle = False
+        while self.state == ProgramState.BUMPING:
+            if not self.data_manager.selfbots or not self.data_manager.servers:
+                if not self.headless:
+                    logger.warning("No selfbots or servers configured. Entering configuration mode.")
+                    self.state = ProgramState.CONFIGURATING
+                    return
+                if not idle:
+                    logger.warning("No selfbots or servers configured. Waiting for a configuration reload.")
+                    idle = True
+                # a reload wakes the queue up
+                await self.queue.wait(IDLE_WAIT)
+                continue
+            idle = False
+
+            if self._queue_outdated:
+                self._rebuild_queue()
+
+            completed = False
+            try:
+                for guild_id in self.queue.pop_due(self.clock.time()):
+                    if self.state != ProgramState.BUMPING:
+                        break
+                    server = self.data_manager.get_server(guild_id)
+                    if server is not None:
+                        await self._bump_due_server(server)
+                else:
+                    completed = True
+            finally:
+                if not completed:
+                    # the remaining servers were popped without being bumped, and
+                    # an attempt cancelled by Ctrl+C didn't reschedule its server
+                    self._queue_outdated = True
+
+            await self._wait_for_next_deadline()
+
+    async def _bump_due_server(self, server: Server):
+        """Try to bump a due server with the available selfbots, then reschedule it."""
+
+        try:
+            await self._try_selfbots(server)
+        finally:
+            self._bumping_with = None
+            while self._outdated_sessions:
+                await self.sessions.close(self._outdated_sessions.pop())
+
+    async def _try_selfbots(self, server: Server):
+        guild_id = server.guild_id
+        logger.info(f"Server {guild_id} is bumpable. Searching for available selfbot...")
+
+        failure_reason = None
+        # a copy, the selfbots may change during an attempt
+        for sb_id, selfbot in list(self.data_manager.selfbots.items()):
+            if not self.data_manager.is_selfbot_able_to_bump(sb_id):
+                continue
 
-                    time.sleep(1)
+            logger.info(f"Trying to bump with selfbot {selfbot.name}...")
+            self._bumping_with = sb_id
 
-        # check state while waiting fo be more reactive to ctrl-c
-        for _ in range(60):
-            if self.state != ProgramState.BUMPING:
+            span = BumpSpan(guild_id, sb_id, self.clock)
+            with span.phase("connect"):
+                selfbot_service = await self.sessions.get(sb_id)
+            if selfbot_service is None:
+                self._record(span, "no_session")
+                delay = self.data_manager.record_selfbot_failure(sb_id, "could not connect")
+                logger.warning(f"Selfbot {selfbot.name} parked for {delay // 60} min after {selfbot.failure_count} failures.")
+                continue
+            self.data_manager.clear_selfbot_failures(sb_id)
+
+            logger.info(f"Sending bump command to channel {server.channel_id}...")
+            # journaled first: if the program dies before the outcome is
+            # persisted, the next start won't bump the server again at once
+            self.data_manager.begin_attempt(guild_id, sb_id)
+            pending = await selfbot_service.bump_server(server.channel_id, span)
+
+            result = None
+            if pending is not None:
+                with span.phase("response"):
+                    result = await selfbot_service.wait_for_bump_result(pending, 5)
+
+            if result and result.kind is BumpReplyKind.UNKNOWN:
+                # e.g. the server is not listed: another account won't do better,
+                # the server is parked with a growing backoff instead
+                self.data_manager.end_attempt(guild_id)
+                self._record(span, "unknown_reply")
+                failure_reason = f"unknown reply of Disboard: {textwrap.shorten(result.reply, FAILURE_REPLY_LENGTH)}"
                 break
-            time.sleep(1)
+            elif result:
+                # the outcome is persisted in a single transaction
+                with span.phase("persist"), self.data_manager.batch():
+                    if result.success:
+                        logger.info(f"Server bumped! Next bump in {result.next_bump_delay_seconds // 60} min.")
+                        self.data_manager.set_selfbot_cooldown(sb_id, SELFBOT_COOLDOWN)
+                        self.bump_count += 1
+                    else:
+                        logger.info(f"Bump failed. Cooldown set to {result.next_bump_delay_seconds // 60} min.")
+
+                    self.data_manager.set_server_cooldown(guild_id, result.next_bump_delay_seconds)
+                    self.data_manager.clear_server_failures(guild_id)
+                    self.data_manager.end_attempt(guild_id)
+                self._record(span, "success" if result.success else "cooldown", result.next_bump_delay_seconds)
+
+                if not self.data_manager.is_server_bumpable(server):
+                    return # move to next server
+            else:
+                self.data_manager.end_attempt(guild_id)
+                self._record(span, "timeout" if pending is not None else "error")
+                failure_reason = "no reply from Disboard" if pending is not None else "command could not be sent"
+                logger.warning("No result received from Discord.")
+
+        if failure_reason is not None:
+            # park the server, its listener notification reschedules it
+            delay = self.data_manager.record_server_failure(guild_id, failure_reason)
+            logger.warning(f"Server {guild_id} parked for {delay // 60} min after {server.failure_count} failures: {failure_reason}.")
+            return
 
-    def _configurating(self):
-        console.clear()
+        # No selfbot was available: retry when the first one is
+        retry_at = max(self.clock.time() + 1, self._next_selfbot_availability())
+        position = self._positions.setdefault(guild_id, len(self._positions))
+        self.queue.push(guild_id, retry_at, position)
+
+    def _record(self, span: BumpSpan, outcome: str, cooldown: int | None = None):
+        """Finish the span of a bump attempt, count its outcome and append it to the history."""
+
+        span.finish(outcome)
+        if outcome != "no_session":
+            BUMP_OUTCOMES.inc(span.guild_id, outcome)
+        self.tracer.write(span)
+        self.history.record(
+            self.clock.to_wall(self.clock.time() - span.duration), span.guild_id, span.selfbot_id, outcome, cooldown, span.duration
+        )
+
+    def _next_selfbot_availability(self) -> float:
+        """Return the timestamp at which the first selfbot will be able to bump."""
+
+        timestamps = [
+            selfbot.next_attempt_timestamp() for selfbot in self.data_manager.selfbots.values()
+        ]
+        if not timestamps:
+            return self.clock.time() + RETRY_DELAY
+        return float(min(timestamps))
 
+    async def _wait_for_next_deadline(self):
+        """Sleep until the next server is due or the schedule changes."""
+
+        deadline = self.queue.next_deadline()
+        remaining = IDLE_WAIT if deadline is None else deadline - self.clock.time()
+        if remaining > 0:
+            woken_early = await self.queue.wait(remaining)
+            SCHEDULER_WAKEUPS.inc("change" if woken_early else "deadline")
+
+    def _configurating(self):
+        # the logs are written by another thread: let them reach the console
+        # before the menu, so they don't show up below the prompt
+        flush_logs()
+        # the screen is cleared once an option is chosen, so the output of the
+        # previous one stays above the menu without waiting for it to be read
         menu_table = Table(show_header=False, box=None, padding=(0, 2))
         menu_table.add_column("ID", style="bold cyan", justify="right")
         menu_table.add_column("Description", style="white")
@@ -111,6 +437,8 @@ class BumpScheduler():
         menu_table.add_row("6.", "Register new server")
         menu_table.add_row("7.", "Remove server")
         menu_table.add_row("8.", "Reorder servers")
+        menu_table.add_row("9.", "Import servers from a file")
+        menu_table.add_row("10.", "Set the name refresh interval of a server")
         menu_table.add_row(None, None)
         menu_table.add_row("0.", "Close program")
 
@@ -126,13 +454,13 @@ class BumpScheduler():
 
         choice = Prompt.ask(
             "Please select an option", 
-            choices=["0", "1", "2", "3", "4", "5", "6", "7", "8"],
+            choices=["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10"],
             show_choices=False
         )
+        console.clear()
 
         match choice:
             case "1":
-                console.clear()
                 logger.info("Resuming auto-bump loop...")
                 self.state = ProgramState.BUMPING
             case "2":
@@ -140,16 +468,13 @@ class BumpScheduler():
                 console.input("Press [#99aab5]Enter[/] to continue...")
             case "3":
                 token = console.input("Account token: ")
-                service = self.data_manager.register_and_start_selfbot_service(token)
-                if service is not None:
-                    service.stop()
+                self._run(self.register_selfbot(token))
             case "4":
                 guild_id = console.input("Selfbot ID to remove: ")
                 if guild_id.isdigit():
-                    self.data_manager.remove_selfbot(int(guild_id))
+                    self._run(self.remove_selfbot(int(guild_id)))
                 else:
                     console.print("Invalid ID.")
-                time.sleep(2)
             case "5":
                 self.data_manager.display_servers()
                 console.input("Press [#99aab5]Enter[/] to continue...")
@@ -157,39 +482,123 @@ class BumpScheduler():
                 guild_id = console.input("Server ID: ")
                 channel_id = console.input("Channel ID: ")
                 if guild_id.isdigit() and channel_id.isdigit():
-                    for selfbot_id in self.data_manager.selfbots.keys():
-                        sb_id = int(selfbot_id)
-                        selfbot_service = self.data_manager.update_and_start_selfbot_service(sb_id)
-                        if selfbot_service is not None:
-                            registered = self.data_manager.register_server(int(guild_id), int(channel_id), selfbot_service)
-                            selfbot_service.stop()
-                            if registered:
-                                break
+                    self._run(self.register_server(int(guild_id), int(channel_id)))
                 else:
                     console.print("Invalid inputs.")
-                time.sleep(2)
             case "7":
                 guild_id = console.input("Server ID to remove: ")
                 if guild_id.isdigit():
                     self.data_manager.remove_server(int(guild_id))
                 else:
                     console.print("Invalid ID.")
-                time.sleep(2)
 
             case "8":
                 self._reorder_servers()
+            case "9":
+                path = console.input("CSV or JSON file of server and channel IDs: ").strip()
+                try:
+                    rows = read_import_file(Path(path))
+                except (OSError, ValueError) as e:
+                    console.print(f"[red]Could not read {path}: {e}[/]")
+                else:
+                    display_import_report(self._run(self.import_servers(rows)))
+            case "10":
+                guild_id = console.input("Server ID: ")
+                hours = console.input("Hours between two refreshes of its names: ")
+                if guild_id.isdigit() and hours.isdigit():
+                    if self.data_manager.set_server_metadata_ttl(int(guild_id), int(hours) * 3600):
+                        console.print(f"The names of server {guild_id} will be refreshed every {hours} hours.")
+                else:
+                    console.print("Invalid inputs.")
 
             case "0":
                 self.state = ProgramState.EXIT
             case _:
                 console.print("Invalid option.")
 
+    async def register_selfbot(self, token: str) -> int | None:
+        """Register an account and keep its session. Return its ID, or None if it could not connect."""
+
+        service = await self.data_manager.register_and_start_selfbot_service(token)
+        if service is None:
+            return None
+
+        account = await service.get_account_id_and_name()
+        if account is not None:
+            await self.sessions.adopt(account[0], service)
+            return account[0]
+        await service.stop()
+        return None
+
+    async def register_server(self, guild_id: int, channel_id: int) -> bool:
+        """Register a server with the first account able to see it. Return True if registered."""
+
+        # a copy, the selfbots may change while a session connects
+        for selfbot_id in list(self.data_manager.selfbots.keys()):
+            selfbot_service = await self.sessions.get(selfbot_id)
+            if selfbot_service is not None:
+                registered = await self.data_manager.register_server(guild_id, channel_id, selfbot_service)
+                if registered:
+                    return True
+        return False
+
+    async def import_servers(self, rows: list[ImportRow]) -> list[ImportRow]:
+        """
+        Register the servers of an import file, resolved through a single session.
+
+        An already connected account is preferred, the others are only
+        connected if none is. The servers found are saved at once, and the
+        `error` of the other rows is set.
+        """
+
+        connected = self.sessions.connected_ids()
+        # a copy, the selfbots may change while a session connects
+        selfbot_ids = sorted(self.data_manager.selfbots, key=lambda selfbot_id: selfbot_id not in connected)
+        selfbot_service = None
+        for selfbot_id in selfbot_ids:
+            selfbot_service = await self.sessions.get(selfbot_id)
+            if selfbot_service is not None:
+                break
+
+        if selfbot_service is None:
+            for row in rows:
+                row.error = row.error or "no selfbot could connect"
+            return rows
+
+        servers = await resolve_servers(rows, selfbot_service, set(self.data_manager.servers), self.clock.time())
+        added = {server.guild_id for server in self.data_manager.add_servers(servers)}
+        for row in rows:
+            if row.error is None and row.guild_id not in added:
+                # registered while the names were resolved
+                row.error = "already registered"
+        return rows
+
+    async def change_server_channel(self, guild_id: int, channel_id: int) -> bool:
+        """Change the channel of a server, checked with the first connected account. Return True if changed."""
+
+        for selfbot_id in list(self.data_manager.selfbots.keys()):
+            selfbot_service = await self.sessions.get(selfbot_id)
+            if selfbot_service is not None:
+                return await self.data_manager.change_server_channel(guild_id, channel_id, selfbot_service)
+        return False
+
+    async def remove_selfbot(self, selfbot_id: int) -> bool:
+        """Remove an account and close its session. Return True if it was registered."""
+
+        removed = self.data_manager.remove_selfbot(selfbot_id)
+        await self._close_session(selfbot_id)
+        return removed
+
     def _reorder_servers(self):
         save = False
-        temporary_server_list = self.data_manager.servers.copy()
+        temporary_server_list = list(self.data_manager.servers.values())
+        error = None
         while True:
             console.clear()
             self._display_reordering_servers(temporary_server_list)
+            if error is not None:
+                console.print(f"[red]Error:[/] {error}")
+                error = None
             user_input = Prompt.ask(
                 "Enter [bold cyan]index target[/] to move, [bold green]s[/]ave, or [bold red]q[/]uit",
                 default="q",
@@ -204,8 +613,7 @@ class BumpScheduler():
 
             splitted_input = user_input.split()
             if len(splitted_input) != 2:
-                console.print("[red]Error:[/] Please enter exactly two numbers separated by a space.")
-                time.sleep(1.5)
+                error = "Please enter exactly two numbers separated by a space."
                 continue
             try:
                 current_index = int(splitted_input[0])
@@ -216,8 +624,7 @@ class BumpScheduler():
                 target_index -= 1
 
                 if current_index < 0 or current_index >= len(temporary_server_list):
-                    console.print("[red]Error:[/] Please enter a valid index")
-                    time.sleep(1.5)
+                    error = "Please enter a valid index"
                     continue
                 target_index = max(0, target_index)
                 target_index = min(target_index, len(temporary_server_list) - 1)
@@ -226,24 +633,22 @@ class BumpScheduler():
                 temporary_server_list.insert(target_index, server)
 
             except ValueError:
-                console.print("[red]Error:[/] Please enter exactly two numbers separated by a space.")
-                time.sleep(1.5)
+                error = "Please enter exactly two numbers separated by a space."
                     
+        console.clear()
         if save:
             self.data_manager.change_order_of_servers(temporary_server_list)
-            time.sleep(3)
         else:
             console.print("[yellow]No changes were made.[/]")
-            time.sleep(1.5)
 
 
-    def _display_reordering_servers(self, server_list: list):
+    def _display_reordering_servers(self, server_list: list[Server]):
         console.print("\n")
         if not server_list:
             console.print("[red]No servers.[/red]")
             return
 
-        server_table = Table(title=f"Servers order", box=box.ROUNDED)
+        server_table = Table(title="Servers order", box=box.ROUNDED)
 
         server_table.add_column("Index", style="purple")
         server_table.add_column("Server Name", style="blue")
@@ -252,13 +657,13 @@ class BumpScheduler():
 
             server_table.add_row(
                 str(index),
-                f"{server['GuildName']}",
+                server.guild_name,
             )
 
         console.print(server_table)
 
 
-    def _exit(self):
-        console.print(f"Goodbye ! {self.bump_count} bump sent this session.")
-        time.sleep(1.75)
-        sys.exit(0)
\ No newline at end of file
+    def _exit(self) -> bool:
+        clean = self._run(self.close(SHUTDOWN_TIMEOUT))
+        self._runner.close()
+        return clean
\ No newline at end of file
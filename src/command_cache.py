@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from src.clock import SYSTEM_CLOCK, Clock
+
+logger = logging.getLogger(__name__)
+
+# Seconds a resolved command stays valid without being looked up again
+COMMAND_CACHE_TTL = 6 * 3600
+
+class CommandCache():
+    """
+    Cache of the resolved Disboard /bump commands, keyed by channel ID.
+
+    The cache stores the raw command payload returned by Discord, so it can be
+    shared by all the sessions and saved between runs. Entries expire after a
+    TTL and must be invalidated when invoking the command fails.
+    """
+
+    def __init__(self, path: Path | None = None, ttl: float = COMMAND_CACHE_TTL, clock: Clock | None = None):
+        """
+        Parameters
+        ----------
+        path : Path or None, optional
+            The file where the cache is persisted, None to keep it in memory only.
+        ttl : float, optional
+            The lifetime of an entry in seconds.
+        clock : Clock, optional
+            The time source of the expirations (default is `SYSTEM_CLOCK`).
+        """
+
+        self._path = path
+        self._ttl = ttl
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._entries: dict[int, tuple[float, dict[str, Any]]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if self._path is None or not self._path.exists():
+            return
+        try:
+            with open(self._path, "r", encoding='utf-8') as f:
+                document = json.load(f)
+            for channel_id, entry in document.items():
+                self._entries[int(channel_id)] = (
+                    self._clock.from_wall(float(entry["ExpiresAt"])), entry["Command"]
+                )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid command cache {self._path}: {e}")
+            self._entries.clear()
+
+    def get(self, channel_id: int) -> dict[str, Any] | None:
+        """Return the command payload cached for a channel, or None if missing or expired."""
+
+        entry = self._entries.get(channel_id)
+        if entry is None:
+            return None
+        expires_at, command = entry
+        if expires_at <= self._clock.time():
+            self.invalidate(channel_id)
+            return None
+        return command
+
+    def put(self, channel_id: int, command: dict[str, Any]):
+        """Cache the command payload resolved for a channel."""
+        self._entries[channel_id] = (self._clock.time() + self._ttl, command)
+        self._dirty = True
+
+    def invalidate(self, channel_id: int):
+        """Forget the command cached for a channel."""
+        if self._entries.pop(channel_id, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Persist the cache if it has a file and was changed."""
+
+        if self._path is None or not self._dirty:
+            return
+        document = {
+            str(channel_id): {"ExpiresAt": self._clock.to_wall(expires_at), "Command": command}
+            for channel_id, (expires_at, command) in self._entries.items()
+        }
+        temporary_path = self._path.with_suffix(self._path.suffix + ".tmp")
+        with open(temporary_path, "w", encoding='utf-8') as file:
+            json.dump(document, file)
+        os.replace(temporary_path, self._path)
+        self._dirty = False
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+import socket
+import time
+from typing import TYPE_CHECKING, Any
+
+from rich.table import Table
+from rich import box
+
+from src.console import console
+from src.server_import import ImportRow
+
+if TYPE_CHECKING:
+    from src.bump_scheduler import BumpScheduler
+
+logger = logging.getLogger(__name__)
+
+# Name of the control socket in the data directory, None to disable it
+CONTROL_SOCKET_NAME = "control.sock"
+# Seconds the client waits for an answer, registering can start a session
+CLIENT_TIMEOUT = 60
+
+class ControlError(Exception):
+    """A control command which could not be done. Its message is sent to the client."""
+
+class ControlServer():
+    """
+    Serves the configuration of a running scheduler over a Unix socket.
+
+    The protocol is one JSON object per line. A request holds the command
+    name in "Command" and its arguments, for example
+    `{"Command": "remove_server", "GuildId": 123}`. The answer is
+    `{"Ok": true, "Result": ...}` or `{"Ok": false, "Error": "..."}`.
+
+    The commands run on the event loop of the scheduler, concurrently with the
+    bump loop, which keeps running while the configuration changes. They share
+    its sessions through the session pool.
+    The socket is only readable by its owner, it accepts account tokens.
+    """
+
+    def __init__(self, scheduler: "BumpScheduler", path: Path):
+        self.scheduler = scheduler
+        self.path = path
+        self._commands = {
+            "status": self._status,
+            "reload": self._reload,
+            "register_selfbot": self._register_selfbot,
+            "remove_selfbot": self._remove_selfbot,
+            "register_server": self._register_server,
+            "remove_server": self._remove_server,
+            "set_channel": self._set_channel,
+            "set_metadata_ttl": self._set_metadata_ttl,
+            "reorder_servers": self._reorder_servers,
+            "import_servers": self._import_servers,
+        }
+
+    async def serve(self):
+        """Serve until cancelled. A socket used by another instance is logged and ignored."""
+
+        if not hasattr(socket, "AF_UNIX"):
+            logger.info("Control API disabled, Unix sockets are not available on this platform.")
+            return
+
+        if self.path.exists():
+            if _is_listening(self.path):
+                logger.warning(f"Control API disabled, another instance listens on {self.path}.")
+                return
+            # left by a process which did not exit cleanly
+            self.path.unlink()
+
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.path)
+        except OSError as e:
+            logger.warning(f"Control API disabled, could not listen on {self.path}: {e}")
+            return
+        os.chmod(self.path, 0o600)
+
+        logger.info(f"Control API available at {self.path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                answer = await self._answer(line)
+                writer.write(json.dumps(answer).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError: a line over the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            handler = self._commands.get(request.get("Command"))
+        except (json.JSONDecodeError, AttributeError):
+            return {"Ok": False, "Error": "The request must be a JSON object."}
+        if handler is None:
+            return {"Ok": False, "Error": f"Unknown command: {request.get('Command')}."}
+
+        try:
+            return {"Ok": True, "Result": await handler(request)}
+        except ControlError as e:
+            return {"Ok": False, "Error": str(e)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"Ok": False, "Error": f"Invalid arguments: {e}"}
+        except Exception as e:
+            logger.exception(f"Control command {request['Command']} failed.")
+            return {"Ok": False, "Error": f"Internal error: {e}"}
+
+    async def _status(self, request: dict) -> dict:
+        return self.scheduler.status()
+
+    async def _reload(self, request: dict) -> None:
+        await self.scheduler.reload()
+
+    async def _register_selfbot(self, request: dict) -> int:
+        selfbot_id = await self.scheduler.register_selfbot(str(request["Token"]))
+        if selfbot_id is None:
+            raise ControlError("Could not connect with this token.")
+        return selfbot_id
+
+    async def _remove_selfbot(self, request: dict) -> None:
+        selfbot_id = int(request["SelfbotId"])
+        if not await self.scheduler.remove_selfbot(selfbot_id):
+            raise ControlError(f"Selfbot ID {selfbot_id} not found.")
+
+    async def _register_server(self, request: dict) -> None:
+        guild_id = int(request["GuildId"])
+        if guild_id in self.scheduler.data_manager.servers:
+            raise ControlError(f"Server ID {guild_id} is already registered.")
+        if not await self.scheduler.register_server(guild_id, int(request["ChannelId"])):
+            raise ControlError(f"Server ID {guild_id} not found by any selfbot.")
+
+    async def _remove_server(self, request: dict) -> None:
+        guild_id = int(request["GuildId"])
+        if not self.scheduler.data_manager.remove_server(guild_id):
+            raise ControlError(f"Server ID {guild_id} not found.")
+
+    async def _set_channel(self, request: dict) -> None:
+        guild_id = int(request["GuildId"])
+        if guild_id not in self.scheduler.data_manager.servers:
+            raise ControlError(f"Server ID {guild_id} is not registered.")
+        if not await self.scheduler.change_server_channel(guild_id, int(request["ChannelId"])):
+            raise ControlError("Channel not changed: it is the same, or not found by any selfbot.")
+
+    async def _set_metadata_ttl(self, request: dict) -> None:
+        guild_id = int(request["GuildId"])
+        if not self.scheduler.data_manager.set_server_metadata_ttl(guild_id, int(request["Seconds"])):
+            raise ControlError(f"Server ID {guild_id} is not registered.")
+
+    async def _reorder_servers(self, request: dict) -> None:
+        data_manager = self.scheduler.data_manager
+        guild_ids = [int(guild_id) for guild_id in request["GuildIds"]]
+        if len(guild_ids) != len(data_manager.servers) or set(guild_ids) != data_manager.servers.keys():
+            raise ControlError("The new order must contain each registered server exactly once.")
+        data_manager.change_order_of_servers([data_manager.servers[guild_id] for guild_id in guild_ids])
+
+    async def _import_servers(self, request: dict) -> list[dict]:
+        rows = [ImportRow.from_dict(row) for row in request["Servers"]]
+        for row in rows:
+            if row.guild_id is not None:
+                row.guild_id, row.channel_id = int(row.guild_id), int(row.channel_id)
+        return [row.to_dict() for row in await self.scheduler.import_servers(rows)]
+
+def _is_listening(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(str(path))
+            return True
+        except OSError:
+            return False
+
+def send_request(path: Path, command: str, arguments: dict[str, Any] | None = None, timeout: float = CLIENT_TIMEOUT) -> Any:
+    """
+    Send a command to the control socket of a running instance.
+
+    Parameters
+    ----------
+    path : Path
+        The control socket.
+    command : str
+        The command name, such as "status".
+    arguments : dict, optional
+        The arguments of the command, such as `{"GuildId": 123}`.
+    timeout : float, optional
+        Seconds to wait for the answer.
+
+    Returns
+    -------
+    Any
+        The result of the command.
+
+    Raises
+    ------
+    ControlError
+        If no instance is listening, or if the command failed.
+    """
+
+    request = {"Command": command, **(arguments or {})}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(str(path))
+            client.sendall(json.dumps(request).encode() + b"\n")
+            answer = client.makefile("rb").readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise ControlError(f"No running auto-bumper listens on {path}.")
+    except OSError as e:
+        raise ControlError(f"Could not talk to {path}: {e}")
+
+    if not answer:
+        raise ControlError("The connection was closed without an answer.")
+    answer = json.loads(answer)
+    if not answer["Ok"]:
+        raise ControlError(answer["Error"])
+    return answer["Result"]
+
+def display_status(status: dict):
+    """Print a status snapshot returned by the "status" command."""
+
+    now = time.time()
+    console.print(
+        f"State: [bold]{status['State']}[/], {status['BumpCount']} bumps since "
+        f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(status['StartedAt']))}, "
+        f"next deadline: {_format_deadline(status['NextDeadline'], now)}"
+    )
+
+    selfbot_table = Table(title="Selfbots", box=box.ROUNDED)
+    for column, style in (("ID", "cyan"), ("Name", "magenta"), ("Session", "white"), ("Next attempt", "green")):
+        selfbot_table.add_column(column, style=style)
+    for selfbot in status["Selfbots"]:
+        selfbot_table.add_row(
+            str(selfbot["Id"]), selfbot["Name"], "connected" if selfbot["Connected"] else "-",
+            _format_attempt(selfbot, now)
+        )
+    console.print(selfbot_table)
+
+    server_table = Table(title="Servers", box=box.ROUNDED)
+    for column, style in (("ID", "cyan"), ("Name", "blue"), ("Channel", "magenta"), ("Next attempt", "green")):
+        server_table.add_column(column, style=style)
+    for server in status["Servers"]:
+        server_table.add_row(
+            str(server["GuildId"]), server["GuildName"], server["ChannelName"], _format_attempt(server, now)
+        )
+    console.print(server_table)
+
+def _format_deadline(timestamp: float | None, now: float) -> str:
+    if timestamp is None:
+        return "none"
+    if timestamp <= now:
+        return "now"
+    return f"in {int(timestamp - now) // 60} min"
+
+def _format_attempt(entry: dict, now: float) -> str:
+    text = _format_deadline(entry["NextAttempt"], now)
+    if entry["FailureCount"]:
+        text += f" [red](parked after {entry['FailureCount']} failures: {entry['FailureReason']})[/]"
+    return text
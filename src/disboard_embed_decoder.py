@@ -1,62 +1,98 @@
-import discord
+from dataclasses import dataclass
+from enum import Enum
 import re
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import discord
 
 DISBOARD_LINK = "https://disboard.org/"
 
-def is_success_embed(embed: discord.Embed, guild_id: int) -> bool:
+# A duration such as "1 hour", "87 minutes", "**2h** 5m" or "30 sec"
+_DURATION_PATTERN = re.compile(
+    r"(\d+)[\s*_]*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)\b",
+    re.IGNORECASE
+)
+# A Discord timestamp markup, such as "<t:1700000000:R>"
+_TIMESTAMP_PATTERN = re.compile(r"<t:(\d+)(?::[tTdDfFR])?>")
+_UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1}
+
+class BumpReplyKind(Enum):
+    SUCCESS = "success"
+    COOLDOWN = "cooldown"
+    UNKNOWN = "unknown"
+
+@dataclass(frozen=True, slots=True)
+class BumpReply:
     """
-    Check if an embed from disboard is a success message from a bump.
-    
-    Parameters
-    ----------
-    embed : discord.Embed
-        An embed sent from disboard (reply of /bump command).
-    guild_id : int
-        The id of the bumped guild.
+    The meaning of a reply of Disboard to the /bump command.
 
-    Returns
-    -------
-    bool
-        True if bump success, False otherwise.
+    Attributes
+    ----------
+    kind : BumpReplyKind
+        SUCCESS if the server was bumped, COOLDOWN if it must wait, UNKNOWN if
+        the reply could not be understood.
+    cooldown_seconds : int or None
+        The seconds until the next bump, for a COOLDOWN reply only.
     """
 
-    embed_dict = embed.to_dict()
-    description = embed_dict.get("description")
-    if description is None:
-        return False
-    server_link = DISBOARD_LINK + "server/" + str(guild_id)
-    return server_link in description
+    kind: BumpReplyKind
+    cooldown_seconds: Optional[int] = None
+
+UNKNOWN_REPLY = BumpReply(BumpReplyKind.UNKNOWN)
 
-def find_time_left(embed: discord.Embed) -> int:
+def decode_bump_reply(embed: "discord.Embed", guild_id: int, now: Optional[float] = None) -> BumpReply:
     """
-    Find the time until next bump in an embed
-    
+    Decode an embed sent by Disboard in reply to /bump.
+
     Parameters
     ----------
     embed : discord.Embed
-        An embed sent from disboard (reply of /bump command).
+        The first embed of the reply.
+    guild_id : int
+        The ID of the bumped guild.
+    now : float, optional
+        The current timestamp, used for replies giving the time of the next
+        bump. Defaults to `time.time()`.
 
     Returns
     -------
-    int
-        The time in minutes until next bump if found, -1 otherwise.
+    BumpReply
+        The decoded reply.
     """
 
-    dict = embed.to_dict()
-    description = dict.get("description")
-    if description is None:
-        return -1
-    return _extract_minutes(description)
+    description = embed.description
+    if not description:
+        return UNKNOWN_REPLY
+
+    if f"{DISBOARD_LINK}server/{guild_id}" in description:
+        return BumpReply(BumpReplyKind.SUCCESS)
+
+    seconds = parse_cooldown(description, now)
+    if seconds is None:
+        return UNKNOWN_REPLY
+    return BumpReply(BumpReplyKind.COOLDOWN, seconds)
+
+def parse_cooldown(text: str, now: Optional[float] = None) -> Optional[int]:
+    """
+    Find the time until the next bump in the text of a cooldown reply.
 
-def _extract_minutes(text):
-    """Extract the integer value of minutes from a text using regex."""
-    pattern = r"(\d+)\s+minutes"
+    Durations in hours, minutes and seconds are added up, so "1 hour and
+    5 minutes" gives 3900. A Discord timestamp gives the seconds left until it.
 
-    match = re.search(pattern, text)
+    Returns
+    -------
+    int or None
+        The seconds until the next bump, at least 1, or None if not found.
+    """
 
+    match = _TIMESTAMP_PATTERN.search(text)
     if match:
-        minutes_str = match.group(1)
-        minutes_value = int(minutes_str)
-        return minutes_value
-    else:
-        return -1
+        remaining = int(match.group(1)) - (time.time() if now is None else now)
+        return max(1, round(remaining))
+
+    durations = _DURATION_PATTERN.findall(text)
+    if not durations:
+        return None
+    return max(1, sum(int(value) * _UNIT_SECONDS[unit[0].lower()] for value, unit in durations))
@@ -0,0 +1,100 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+from pathlib import Path
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks when inotify is not available
+POLL_INTERVAL = 2
+# Seconds to wait for the other events of a write, such as an editor saving
+# a file in several steps, before reporting the change
+DEBOUNCE_DELAY = 0.2
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_EVENT_HEADER = struct.Struct("iIII")
+
+class FileWatcher():
+    """
+    Waits for changes of a set of files.
+
+    On Linux, the directories of the files are watched with inotify, so a
+    change is reported as soon as it is written. Elsewhere, or if inotify
+    can't be used, `wait` returns every `POLL_INTERVAL` seconds and the caller
+    compares the modification times itself.
+
+    Attributes
+    ----------
+    paths : list[Path]
+        The watched files. They don't need to exist.
+    """
+
+    def __init__(self, paths: list[Path]):
+        self.paths = paths
+        self._names = {path.name for path in paths}
+        self._changed = asyncio.Event()
+        self._fd: int | None = None
+        self._open_inotify()
+
+    @property
+    def polling(self) -> bool:
+        """True if the changes are found by polling."""
+        return self._fd is None
+
+    def _open_inotify(self):
+        if sys.platform != "linux":
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+            for directory in {path.parent for path in self.paths}:
+                if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+                    os.close(fd)
+                    raise OSError(ctypes.get_errno(), f"Could not watch {directory}")
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify not available ({e}), the data files will be polled.")
+            return
+        self._fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._read_events)
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if name in self._names:
+                self._changed.set()
+
+    async def wait(self):
+        """Wait until a watched file may have changed."""
+
+        if self.polling:
+            await asyncio.sleep(POLL_INTERVAL)
+            return
+
+        await self._changed.wait()
+        await asyncio.sleep(DEBOUNCE_DELAY)
+        self._changed.clear()
+
+    def close(self):
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
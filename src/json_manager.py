@@ -1,11 +1,37 @@
-import json
+from contextlib import contextmanager
+import dataclasses
 import logging
-import time
 from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Callable, Iterator
 from rich.table import Table
 from rich import box
-from src.autobump_selfbot_service import AutoBumpSelfbotService
+from src.clock import SYSTEM_CLOCK, Clock
+from src.command_cache import CommandCache
 from src.console import console
+from src.metrics import STORAGE_WRITE_SECONDS
+from src.models import PendingAttempt, Selfbot, Server
+from src.storage import StorageBackend, open_storage
+
+if TYPE_CHECKING:
+    # imports discord, which is only loaded once a session is started
+    from src.autobump_selfbot_service import AutoBumpSelfbotService
+
+logger = logging.getLogger(__name__)
+
+# Seconds a failing server or account is parked after its first failure,
+# doubled on each consecutive failure
+BACKOFF_BASE = 60
+# Maximum seconds a failing server or account is parked
+BACKOFF_CAP = 6 * 3600
+# Cooldowns applied, from the time the command was sent, to the server and the
+# account of an attempt interrupted before its outcome was recorded. The bump
+# is assumed to have succeeded: waiting too long costs less than a wasted attempt
+PROVISIONAL_SERVER_COOLDOWN = 2 * 3600
+PROVISIONAL_SELFBOT_COOLDOWN = 30 * 60
+# Timestamps of the selfbots and servers, kept in the time of the clock in
+# memory and in system time in the storage
+TIMESTAMP_FIELDS = ("next_bump_timestamp", "backoff_until", "names_refreshed_at")
 
 class DataManager():
     """
@@ -13,58 +39,193 @@ class DataManager():
 
     Attributes
     ----------
-    selfbots : dict[str, dict[str, str | int]]
-        Contains selfbot data, keyed by account ID (str). Each value is a dict 
-        containing the keys "Token", "Name" (str) and "NextBumpTimestamp" (int).
-    servers : list[dict[str, int | str]]
-        List of server/channel configurations. Each dictionary contains the keys 
-        "GuildId" (int), "GuildName" (str), "ChannelId" (int), "ChannelName" (str) 
-        and "NextBumpTimestamp" (int).
+    selfbots : dict[int, Selfbot]
+        The registered selfbots, keyed by account ID.
+    servers : dict[int, Server]
+        The registered servers, keyed by guild ID, in the user's order.
     """
 
-    def __init__(self, data_dir: str = "data"):
-        """Load the json data."""
+    def __init__(self, data_dir: str = "data", storage_backend: str = "sqlite", client_factory=None, clock: Clock | None = None):
+        """
+        Load the data from the storage.
+
+        Parameters
+        ----------
+        data_dir : str, optional
+            The data directory, relative to the project root (default is "data").
+        storage_backend : str, optional
+            "sqlite" (default) or "json".
+        client_factory : Callable[[], discord.Client], optional
+            Builds the Discord client of the selfbot services. See
+            `AutoBumpSelfbotService`.
+        clock : Clock, optional
+            The time source of the cooldowns (default is `SYSTEM_CLOCK`).
+        """
+
         self._root = Path(__file__).parent.parent
         self._data_dir = self._root / data_dir
-        self._selfbots_path = self._data_dir / "selfbots.json"
-        self._servers_path = self._data_dir / "servers.json"
         
-        self.selfbots: dict[str, dict[str, str | int]] = {}
-        self.servers: list[dict[str, int | str]] = []
+        self.selfbots: dict[int, Selfbot] = {}
+        self.servers: dict[int, Server] = {}
+        self._listeners: list[Callable[[int | None], None]] = []
+        self.client_factory = client_factory
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self._batch_depth = 0
         
         self._ensure_data_directory()
-        self._load_selfbots_data()
-        self._load_servers_data()
+        self._storage: StorageBackend = open_storage(self._data_dir, storage_backend)
+        self.command_cache = CommandCache(self._data_dir / "command_cache.json", clock=self.clock)
+        self.selfbots = {selfbot.id: selfbot for selfbot in self._load_selfbots()}
+        self.servers = {server.guild_id: server for server in self._load_servers()}
+        self._reconcile_pending_attempts()
+
+    @property
+    def data_dir(self) -> Path:
+        """The absolute path of the data directory."""
+        return self._data_dir
 
     def _ensure_data_directory(self):
         """Create the data directory if it doesn't exist."""
         self._data_dir.mkdir(parents=True, exist_ok=True)
 
-    def _load_selfbots_data(self):
-        if self._selfbots_path.exists():
-            with open(self._selfbots_path, "r", encoding='utf-8') as f:
-                try:
-                    self.selfbots = json.load(f)
-                except json.JSONDecodeError:
-                    console.print(f"Error loading file: {self._selfbots_path}")
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group the changes made inside a `with` block into one storage transaction.
+
+        The records are only written when the outermost batch ends: its commit
+        is timed as the "commit" kind of the storage write metric.
+
+        Examples
+        --------
+        >>> with data_manager.batch():
+        ...     data_manager.set_selfbot_cooldown(selfbot_id, 1800)
+        ...     data_manager.set_server_cooldown(guild_id, 7200)
+        """
+
+        outermost = self._batch_depth == 0
+        self._batch_depth += 1
+        committing = None
+        try:
+            with self._storage.transaction():
+                yield
+                committing = time.perf_counter()
+        finally:
+            self._batch_depth -= 1
+        if outermost and committing is not None:
+            STORAGE_WRITE_SECONDS.observe(time.perf_counter() - committing, "commit")
+
+    def reload(self) -> set[int]:
+        """
+        Read the selfbots and servers again from the storage, after it was changed by another program.
+
+        Only the differences are applied: unchanged entries keep their object
+        and their schedule, and the listeners are only notified of the servers
+        added, removed or changed.
+
+        Returns
+        -------
+        set[int]
+            The IDs of the selfbots removed or whose token changed. Their
+            sessions are outdated.
+
+        Raises
+        ------
+        SchemaError
+            If the storage can't be read. Nothing is changed.
+        """
+
+        self._storage.reload()
+        selfbots = {selfbot.id: selfbot for selfbot in self._load_selfbots()}
+        servers = {server.guild_id: server for server in self._load_servers()}
+
+        outdated = {
+            selfbot_id for selfbot_id, selfbot in self.selfbots.items()
+            if selfbot_id not in selfbots or selfbots[selfbot_id].token != selfbot.token
+        }
+        selfbots_changed = selfbots != self.selfbots
+        added = servers.keys() - self.servers.keys()
+        removed = self.servers.keys() - servers.keys()
+        changed = {
+            guild_id for guild_id in servers.keys() & self.servers.keys()
+            if servers[guild_id] != self.servers[guild_id]
+        }
+        reordered = (
+            [guild_id for guild_id in self.servers if guild_id in servers]
+            != [guild_id for guild_id in servers if guild_id in self.servers]
+        )
+
+        # new dicts, so that an iteration in progress is not disturbed
+        self.selfbots = {
+            selfbot_id: self.selfbots[selfbot_id] if self.selfbots.get(selfbot_id) == selfbot else selfbot
+            for selfbot_id, selfbot in selfbots.items()
+        }
+        self.servers = {
+            guild_id: server if guild_id in added or guild_id in changed else self.servers[guild_id]
+            for guild_id, server in servers.items()
+        }
+
+        if not (selfbots_changed or added or removed or changed or reordered):
+            logger.debug("Storage reloaded, nothing changed.")
+            return outdated
+
+        logger.info(
+            f"Configuration reloaded: {len(added)} servers added, {len(removed)} removed, {len(changed)} changed"
+            f"{', new order' if reordered else ''}{', selfbots changed' if selfbots_changed else ''}."
+        )
+        if selfbots_changed or reordered:
+            # the available selfbots or the positions of every server changed
+            self._notify()
+        else:
+            for guild_id in added | removed | changed:
+                self._notify(guild_id)
+        return outdated
+
+    def changed_externally(self) -> bool:
+        """Return True if another program changed the storage since it was last read."""
+        return self._storage.changed_externally()
+
+    def watched_paths(self) -> list[Path]:
+        """Return the files changed by a write to the storage."""
+        return self._storage.watched_paths()
+
+    def close(self):
+        """Flush and close the storage."""
+        self.command_cache.save()
+        self._storage.close()
+
+    def add_listener(self, listener: Callable[[int | None], None]):
+        """
+        Register a callback called when the schedule of the servers may have changed.
+
+        Parameters
+        ----------
+        listener : Callable[[int | None], None]
+            Called with the id of the changed server, or None if any server may
+            have changed (new selfbot, new order...).
+        """
+
+        self._listeners.append(listener)
+
+    def _notify(self, guild_id: int | None = None):
+        for listener in self._listeners:
+            listener(guild_id)
 
-    def _load_servers_data(self):
-        if self._servers_path.exists():
-            with open(self._servers_path, "r", encoding='utf-8') as f:
-                try:
-                    self.servers = json.load(f)
-                except json.JSONDecodeError:
-                    console.print(f"Error loading file: {self._servers_path}")
+    def _load_selfbots(self) -> list[Selfbot]:
+        return [_convert_timestamps(selfbot, self.clock.from_wall) for selfbot in self._storage.load_selfbots()]
 
-    def _save_selfbots(self):
-        with open(self._selfbots_path, "w", encoding='utf-8') as file:
-            json.dump(self.selfbots, file, indent=4)
+    def _load_servers(self) -> list[Server]:
+        return [_convert_timestamps(server, self.clock.from_wall) for server in self._storage.load_servers()]
 
-    def _save_servers(self):
-        with open(self._servers_path, "w", encoding='utf-8') as file:
-            json.dump(self.servers, file, indent=4)
+    def _save_selfbot(self, selfbot: Selfbot):
+        with STORAGE_WRITE_SECONDS.time("selfbot"):
+            self._storage.save_selfbot(_convert_timestamps(selfbot, self.clock.to_wall))
 
-    def register_and_start_selfbot_service(self, token: str) -> AutoBumpSelfbotService | None:
+    def _save_server(self, server: Server):
+        with STORAGE_WRITE_SECONDS.time("server"):
+            self._storage.save_server(_convert_timestamps(server, self.clock.to_wall))
+
+    async def register_and_start_selfbot_service(self, token: str) -> "AutoBumpSelfbotService | None":
         """
         Register a new selfbot and start the service.
 
@@ -79,33 +240,38 @@ class DataManager():
             The service created from the token, or None if an error occured.
         """
 
-        selfbot_service = AutoBumpSelfbotService(token)
-        res = selfbot_service.get_account_id_and_name()
+        from src.autobump_selfbot_service import AutoBumpSelfbotService
+
+        selfbot_service = AutoBumpSelfbotService(token, self.command_cache, self.client_factory, self.clock)
+        try:
+            await selfbot_service.start()
+        except Exception as e:
+            console.print(f"Failed to register selfbot: {e}")
+            return None
+
+        res = await selfbot_service.get_account_id_and_name()
         if res is None:
             console.print("Failed to register selfbot: Invalid token or connection error.")
-            selfbot_service.stop()
+            await selfbot_service.stop()
             return None
 
         id = res[0]
-        id_str = str(id)
         name = res[1]
 
-        if id_str in self.selfbots:
+        if id in self.selfbots:
             console.print(f"Selfbot '{name}' (ID: {id}) is already registered.")
             return selfbot_service
 
-        self.selfbots[id_str] = {
-            "Token": token,
-            "Name": name,
-            "NextBumpTimestamp": -1
-        }
+        selfbot = Selfbot(id=id, token=token, name=name)
+        self.selfbots[id] = selfbot
         console.print(f"Selfbot '{name}' (ID: {id}) saved successfully.")
 
-        self._save_selfbots()
+        self._save_selfbot(selfbot)
+        self._notify()
 
         return selfbot_service
 
-    def update_and_start_selfbot_service(self, id: int) -> AutoBumpSelfbotService | None:
+    async def update_and_start_selfbot_service(self, id: int) -> "AutoBumpSelfbotService | None":
         """
         Update the selfbot name and start it.
         
@@ -120,32 +286,39 @@ class DataManager():
             The service created from the id.
         None
             If an error occured.
+
+        Raises
+        ------
+        Exception
+            If the selfbot fails to connect.
         """
 
-        id_str = str(id)
-        selfbot = self.selfbots.get(id_str)
+        selfbot = self.selfbots.get(id)
         if selfbot is None:
             console.print(f"Selfbot ID {id} is not registered.")
             return None
 
-        selfbot_service = AutoBumpSelfbotService(selfbot["Token"]) # type: ignore
+        from src.autobump_selfbot_service import AutoBumpSelfbotService
 
-        res = selfbot_service.get_account_id_and_name()
+        selfbot_service = AutoBumpSelfbotService(selfbot.token, self.command_cache, self.client_factory, self.clock)
+        await selfbot_service.start()
+
+        res = await selfbot_service.get_account_id_and_name()
         if res is None:
             console.print(f"Error updating selfbot ID {id}: Could not retrieve account info.")
-            selfbot_service.stop()
+            await selfbot_service.stop()
             return None
 
         name = res[1]
 
-        if selfbot["Name"] != name:
-            console.print(f"Updated selfbot name (ID: {id}): '{self.selfbots[id_str]["Name"]}' -> '{name}'.")
-            selfbot["Name"] = name
-            self._save_selfbots()
+        if selfbot.name != name:
+            console.print(f"Updated selfbot name (ID: {id}): '{selfbot.name}' -> '{name}'.")
+            selfbot.name = name
+            self._save_selfbot(selfbot)
 
         return selfbot_service
 
-    def remove_selfbot(self, selfbot_id: int):
+    def remove_selfbot(self, selfbot_id: int) -> bool:
         """
         Remove the selfbot if found.
         
@@ -153,36 +326,65 @@ class DataManager():
         -------
         selfbot_id : int
             The id of the selfbot user account.
+
+        Returns
+        -------
+        bool
+            True if the selfbot was removed, False if it was not found.
         """
 
-        id_str = str(selfbot_id)
-        if id_str in self.selfbots:
-            removed_bot = self.selfbots.pop(id_str)
-            self._save_selfbots()
-            console.print(f"Selfbot '{removed_bot['Name']}' (ID: {selfbot_id}) removed successfully.")
-        else:
-            console.print(f"Selfbot ID {selfbot_id} not found.")
+        removed_bot = self.selfbots.pop(selfbot_id, None)
+        if removed_bot is not None:
+            self._storage.delete_selfbot(selfbot_id)
+            console.print(f"Selfbot '{removed_bot.name}' (ID: {selfbot_id}) removed successfully.")
+            self._notify()
+            return True
+        console.print(f"Selfbot ID {selfbot_id} not found.")
+        return False
 
     def is_selfbot_able_to_bump(self, id: int) -> bool:
-        """Check if the personal cooldown of the selfbot has expired."""
+        """Check if the personal cooldown and the backoff of the selfbot have expired."""
 
-        selfbot = self.selfbots.get(str(id))
-        if selfbot is None or not isinstance(selfbot["NextBumpTimestamp"], int) :
+        selfbot = self.selfbots.get(id)
+        if selfbot is None:
             return False
-        return selfbot["NextBumpTimestamp"] <= time.time()
+        return selfbot.next_attempt_timestamp() <= self.clock.time()
+
+    def record_selfbot_failure(self, id: int, reason: str) -> int:
+        """
+        Count a failure of a selfbot and park it with an exponential backoff.
 
-    def set_selfbot_cooldown(self, id: int, cooldown: int):
-        """Set the personal cooldown for a selfbot."""
-        selfbot = self.selfbots.get(str(id))
+        Returns
+        -------
+        int
+            The seconds the selfbot is parked, 0 if it is not registered.
+        """
+
+        selfbot = self.selfbots.get(id)
+        if selfbot is None:
+            return 0
+        delay = _park(selfbot, reason, self.clock.time())
+        self._save_selfbot(selfbot)
+        return delay
+
+    def clear_selfbot_failures(self, id: int):
+        """Reset the failure count and the backoff of a selfbot."""
+
+        selfbot = self.selfbots.get(id)
+        if selfbot is not None and _unpark(selfbot):
+            self._save_selfbot(selfbot)
+
+    def set_selfbot_cooldown(self, id: int, cooldown_seconds: int):
+        """Set the personal cooldown of a selfbot, in seconds."""
+        selfbot = self.selfbots.get(id)
         if selfbot is None:
             console.print(f"Selfbot ID {id} is not registered.")
             return
 
-        if isinstance(selfbot["NextBumpTimestamp"], int):
-            selfbot["NextBumpTimestamp"] = round(time.time()) + cooldown * 60
-            self._save_selfbots()
+        selfbot.next_bump_timestamp = round(self.clock.time()) + cooldown_seconds
+        self._save_selfbot(selfbot)
 
-    def register_server(self, guild_id: int, channel_id: int, selfbot_service: AutoBumpSelfbotService) -> bool:
+    async def register_server(self, guild_id: int, channel_id: int, selfbot_service: "AutoBumpSelfbotService") -> bool:
         """
         Register a new server and the channel associated.
         
@@ -201,8 +403,8 @@ class DataManager():
             True if success, False otherwise.
         """
 
-        guild_name = selfbot_service.get_guild_name(guild_id)
-        channel_name = selfbot_service.get_channel_name(channel_id)
+        guild_name = await selfbot_service.get_guild_name(guild_id)
+        channel_name = await selfbot_service.get_channel_name(channel_id)
 
         if guild_name is None:
             console.print(f"Server ID {guild_id} not found.")
@@ -212,36 +414,53 @@ class DataManager():
             console.print(f"Channel ID {channel_id} not found.")
 
 
-        existing_server = next((server for server in self.servers if server["GuildId"] == guild_id), None)
+        existing_server = self.servers.get(guild_id)
         if existing_server is not None:
             console.print(f"Server '{guild_name}' is already registered.")
             return False
 
         if channel_name is not None:
-            new_server = {
-                "GuildId": guild_id,
-                "GuildName": guild_name,
-                "ChannelId": channel_id,
-                "ChannelName": channel_name,
-                "NextBumpTimestamp" : -1
-            }
-            self.servers.append(new_server)
+            new_server = Server(guild_id, guild_name, channel_id, channel_name, names_refreshed_at=round(self.clock.time()))
+            self.servers[guild_id] = new_server
             console.print(f"Server '{guild_name}' (ID: {guild_id}) saved with channel '{channel_name}' (ID: {channel_id}).")
         else:
-            new_server = {
-                "GuildId": guild_id,
-                "GuildName": guild_name,
-                "ChannelId": -1,
-                "ChannelName": "NO CHANNEL",
-                "NextBumpTimestamp" : -1
-            }
-            self.servers.append(new_server)
+            new_server = Server(guild_id, guild_name, -1, "NO CHANNEL", names_refreshed_at=round(self.clock.time()))
+            self.servers[guild_id] = new_server
             console.print(f"Server '{guild_name}' (ID: {guild_id}) saved without channel. Please update channel.")
 
-        self._save_servers()
+        self._save_server(new_server)
+        self._notify(guild_id)
         return True
 
-    def change_server_channel(self, guild_id: int, channel_id: int, selfbot_service: AutoBumpSelfbotService):
+    def add_servers(self, servers: list[Server]) -> list[Server]:
+        """
+        Register several servers whose names are already resolved, in one save.
+
+        Parameters
+        ----------
+        servers : list[Server]
+            The new servers, placed last in this order.
+
+        Returns
+        -------
+        list[Server]
+            The servers added. The ones registered in the meantime, e.g. by a
+            control command while the names were resolved, are skipped.
+        """
+
+        added = []
+        with self.batch():
+            for server in servers:
+                if server.guild_id in self.servers:
+                    continue
+                self.servers[server.guild_id] = server
+                self._save_server(server)
+                added.append(server)
+        if added:
+            self._notify()
+        return added
+
+    async def change_server_channel(self, guild_id: int, channel_id: int, selfbot_service: "AutoBumpSelfbotService") -> bool:
         """
         Change the channel associated with a server.
         
@@ -253,30 +472,39 @@ class DataManager():
             The id of the new channel to register with the server.
         selfbot_service : AutoBumpSelfbotService
             A selfbot service which has an access to the server and channel.
+
+        Returns
+        -------
+        bool
+            True if the channel was changed.
         """
 
-        existing_server = next((server for server in self.servers if server["GuildId"] == guild_id), None)
+        existing_server = self.servers.get(guild_id)
         if existing_server is None:
             console.print(f"Server ID {guild_id} is not registered.")
-            return
+            return False
 
-        if existing_server["ChannelId"] == channel_id:
-            console.print(f"Channel for server '{existing_server['GuildName']}' is unchanged.")
-            return
+        if existing_server.channel_id == channel_id:
+            console.print(f"Channel for server '{existing_server.guild_name}' is unchanged.")
+            return False
 
-        channel_name = selfbot_service.get_channel_name(channel_id)
+        channel_name = await selfbot_service.get_channel_name(channel_id)
 
         if channel_name is None:
             console.print(f"Channel ID {channel_id} not found.")
-            return
+            return False
 
-        console.print(f"Updated channel for server '{existing_server['GuildName']}': '{existing_server['ChannelName']}' -> '{channel_name}'.")
-        existing_server["ChannelId"] = channel_id
-        existing_server["ChannelName"] = channel_name
+        console.print(f"Updated channel for server '{existing_server.guild_name}': '{existing_server.channel_name}' -> '{channel_name}'.")
+        existing_server.channel_id = channel_id
+        existing_server.channel_name = channel_name
+        # the failures were probably caused by the previous channel
+        _unpark(existing_server)
 
-        self._save_servers()
+        self._save_server(existing_server)
+        self._notify(guild_id)
+        return True
 
-    def update_server(self, guild_id: int, selfbot_service: AutoBumpSelfbotService):
+    async def update_server(self, guild_id: int, selfbot_service: "AutoBumpSelfbotService"):
         """
         Update the name of the server and its associated channel.
         
@@ -288,37 +516,60 @@ class DataManager():
             A selfbot service which has an access to the server.
         """
 
-        guild_name = selfbot_service.get_guild_name(guild_id)
+        guild_name = await selfbot_service.get_guild_name(guild_id)
 
         if guild_name is None:
             console.print(f"Server ID {guild_id} not found.")
             return
 
-        should_save = False
-        existing_server = next((server for server in self.servers if server["GuildId"] == guild_id), None)
+        existing_server = self.servers.get(guild_id)
         if existing_server is None:
             console.print(f"Server '{guild_name}' is not registered.")
             return
 
-        channel_id: int = existing_server["ChannelId"] # type: ignore
-        channel_name = selfbot_service.get_channel_name(channel_id)
+        channel_id = existing_server.channel_id
+        channel_name = await selfbot_service.get_channel_name(channel_id)
         if channel_name is None:
             console.print(f"Channel ID {channel_id} not found (Server: '{guild_name}').")
 
-        if existing_server["GuildName"] != guild_name and guild_name is not None:
-            console.print(f"Updated server name (ID: {guild_id}): '{existing_server['GuildName']}' -> '{guild_name}'.")
-            existing_server["GuildName"] = guild_name
-            should_save = True
+        if existing_server.guild_name != guild_name and guild_name is not None:
+            console.print(f"Updated server name (ID: {guild_id}): '{existing_server.guild_name}' -> '{guild_name}'.")
+            existing_server.guild_name = guild_name
+
+        if existing_server.channel_name != channel_name and channel_name is not None:
+            console.print(f"Updated channel name for '{guild_name}': '{existing_server.channel_name}' -> '{channel_name}'.")
+            existing_server.channel_name = channel_name
+
+        existing_server.names_refreshed_at = round(self.clock.time())
+        self._save_server(existing_server)
+
+    def set_server_metadata_ttl(self, guild_id: int, ttl: int) -> bool:
+        """
+        Set how often the names of a server are refreshed.
 
-        if existing_server["ChannelName"] != channel_name and channel_name is not None:
-            console.print(f"Updated channel name for '{guild_name}': '{existing_server['ChannelName']}' -> '{channel_name}'.")
-            existing_server["ChannelName"] = channel_name
-            should_save = True
+        Parameters
+        ----------
+        guild_id : int
+            The id of the server.
+        ttl : int
+            The seconds between two refreshes of the names.
 
-        if should_save:
-            self._save_servers()
+        Returns
+        -------
+        bool
+            True if the interval was set, False if the server is not registered.
+        """
 
-    def remove_server(self, guild_id: int):
+        server = self.servers.get(guild_id)
+        if server is None:
+            console.print(f"Server ID {guild_id} is not registered.")
+            return False
+
+        server.metadata_ttl = max(0, ttl)
+        self._save_server(server)
+        return True
+
+    def remove_server(self, guild_id: int) -> bool:
         """
         Remove the server if found.
         
@@ -326,48 +577,142 @@ class DataManager():
         -------
         guild_id : int
             The id of the server.
+
+        Returns
+        -------
+        bool
+            True if the server was removed, False if it was not found.
         """
-        initial_count = len(self.servers)
-        self.servers[:] = [server for server in self.servers if server["GuildId"] != guild_id]
-        removed_count = initial_count - len(self.servers)
-        if removed_count > 0:
-            self._save_servers()
+        if self.servers.pop(guild_id, None) is not None:
+            self._storage.delete_server(guild_id)
+            self._notify(guild_id)
 
             console.print(f"Server ID {guild_id} removed successfully.")
-        else:
-            console.print(f"Server ID {guild_id} not found.")
+            return True
+        console.print(f"Server ID {guild_id} not found.")
+        return False
+
+    def get_server(self, guild_id: int) -> Server | None:
+        """Return the server registered with this id, or None."""
+        return self.servers.get(guild_id)
 
-    def is_server_bumpable(self, server) -> bool:
-        """Check if the cooldown of the server has expired."""
+    def is_server_bumpable(self, server: Server | None) -> bool:
+        """Check if the cooldown and the backoff of the server have expired."""
 
-        if server is None or not isinstance(server["NextBumpTimestamp"], int) :
+        if server is None:
             return False
-        return server["NextBumpTimestamp"] <= time.time()
+        return server.next_attempt_timestamp() <= self.clock.time()
 
-    def set_server_cooldown(self, id: int, cooldown: int):
-        """Set the personal cooldown for a selfbot."""
+    def record_server_failure(self, guild_id: int, reason: str) -> int:
+        """
+        Count a failed bump of a server and park it with an exponential backoff.
 
-        server = next((server for server in self.servers if server["GuildId"] == id), None)
+        Returns
+        -------
+        int
+            The seconds the server is parked, 0 if it is not registered.
+        """
+
+        server = self.servers.get(guild_id)
+        if server is None:
+            return 0
+        delay = _park(server, reason, self.clock.time())
+        self._save_server(server)
+        self._notify(guild_id)
+        return delay
+
+    def clear_server_failures(self, guild_id: int):
+        """Reset the failure count and the backoff of a server."""
+
+        server = self.servers.get(guild_id)
+        if server is not None and _unpark(server):
+            self._save_server(server)
+            self._notify(guild_id)
+
+    def begin_attempt(self, guild_id: int, selfbot_id: int):
+        """
+        Durably record that a bump command is about to be sent, before it is.
+
+        The entry is removed by `end_attempt` once the outcome is persisted. If
+        the program stops in between, the attempt is reconciled at the next
+        start. Like the other writes, it is only saved when the current batch
+        ends: it must be called outside of any batch, right before the command.
+        """
+
+        attempt = PendingAttempt(guild_id, selfbot_id, round(self.clock.to_wall(self.clock.time())))
+        with STORAGE_WRITE_SECONDS.time("journal"):
+            self._storage.save_pending_attempt(attempt)
+
+    def end_attempt(self, guild_id: int):
+        """Mark the attempt on a server as resolved, once its outcome is persisted."""
+
+        with STORAGE_WRITE_SECONDS.time("journal"):
+            self._storage.delete_pending_attempt(guild_id)
+
+    def _reconcile_pending_attempts(self):
+        """Apply the provisional cooldowns of the attempts interrupted by the last stop."""
+
+        attempts = self._storage.load_pending_attempts()
+        if not attempts:
+            return
+
+        with self.batch():
+            for attempt in attempts:
+                sent_at = round(self.clock.from_wall(attempt.sent_at))
+                server = self.servers.get(attempt.guild_id)
+                if server is not None:
+                    server.next_bump_timestamp = max(
+                        server.next_bump_timestamp, sent_at + PROVISIONAL_SERVER_COOLDOWN
+                    )
+                    self._save_server(server)
+                    logger.warning(
+                        f"The outcome of the bump of server {attempt.guild_id} was not recorded before the last stop, "
+                        f"assuming it succeeded: next attempt at the earliest {PROVISIONAL_SERVER_COOLDOWN // 60} min "
+                        "after it was sent."
+                    )
+                selfbot = self.selfbots.get(attempt.selfbot_id)
+                if selfbot is not None:
+                    selfbot.next_bump_timestamp = max(
+                        selfbot.next_bump_timestamp, sent_at + PROVISIONAL_SELFBOT_COOLDOWN
+                    )
+                    self._save_selfbot(selfbot)
+                self._storage.delete_pending_attempt(attempt.guild_id)
+
+    def set_server_cooldown(self, id: int, cooldown_seconds: int):
+        """Set the cooldown of a server, in seconds."""
+
+        server = self.servers.get(id)
         if server is None:
             console.print(f"Server ID {id} is not registered.")
             return
 
-        if isinstance(server["NextBumpTimestamp"], int):
-            server["NextBumpTimestamp"] = round(time.time()) + cooldown * 60
-            self._save_servers()
+        server.next_bump_timestamp = round(self.clock.time()) + cooldown_seconds
+        self._save_server(server)
+        self._notify(id)
 
-    def change_order_of_servers(self, new_server_list: list):
-        required_keys = {"GuildId", "GuildName", "ChannelId", "ChannelName", "NextBumpTimestamp"}
-        is_valid = all(server.keys() == required_keys for server in new_server_list)
+    def change_order_of_servers(self, new_server_list: list[Server]) -> bool:
+        """
+        Change the order in which the servers are bumped.
+
+        Returns
+        -------
+        bool
+            True if the order was changed, False if it is the same or invalid.
+        """
+
+        new_order = [server.guild_id for server in new_server_list]
+        is_valid = len(new_order) == len(self.servers) and set(new_order) == self.servers.keys()
         if is_valid:
-            if new_server_list != self.servers:
-                self.servers = new_server_list
-                self._save_servers()
+            if new_order != list(self.servers.keys()):
+                self.servers = {server.guild_id: server for server in new_server_list}
+                self._storage.save_server_order(new_order)
+                self._notify()
                 console.print("[green]Server order changed.")
-            else:
-                console.print("[yellow]New order is the same as before, no changes.[/]")
+                return True
+            console.print("[yellow]New order is the same as before, no changes.[/]")
         else:
-            console.print(f"[red]Error:[/] new server list do not contains the required keys ({required_keys})")
+            console.print("[red]Error:[/] new server list must contain each registered server exactly once.")
+        return False
 
     def display_selfbots(self):
         console.print("\n")
@@ -382,17 +727,19 @@ class DataManager():
         selfbot_table.add_column("Status", justify="right")
 
         for bot_id, bot_data in self.selfbots.items():
-            now = time.time()
-            minutes_remaining = (bot_data["NextBumpTimestamp"] - now) / 60 # type: ignore
+            now = self.clock.time()
+            minutes_remaining = (bot_data.next_bump_timestamp - now) / 60
             
-            if minutes_remaining <= 0:
+            if bot_data.backoff_until > now:
+                time_display = _parked_display(bot_data, now)
+            elif minutes_remaining <= 0:
                 time_display = "[bold green]Ready to bump![/]"
             else:
                 time_display = f"[yellow]Ready in {round(minutes_remaining)} min[/]"
 
             selfbot_table.add_row(
                 str(bot_id),
-                str(bot_data['Name']),
+                bot_data.name,
                 time_display
             )
 
@@ -411,20 +758,54 @@ class DataManager():
         server_table.add_column("Target Channel", style="cyan")
         server_table.add_column("Status", justify="right")
 
-        for index, server in enumerate(self.servers, start=1):
-            now = time.time()
-            minutes_remaining = (server["NextBumpTimestamp"] - now) / 60 # type: ignore
+        for index, server in enumerate(self.servers.values(), start=1):
+            now = self.clock.time()
+            minutes_remaining = (server.next_bump_timestamp - now) / 60
 
-            if minutes_remaining <= 0:
+            if server.backoff_until > now:
+                status_display = _parked_display(server, now)
+            elif minutes_remaining <= 0:
                 status_display = "[bold green]Ready to bump[/]"
             else:
                 status_display = f"[yellow]{round(minutes_remaining)} min until bump[/]"
 
             server_table.add_row(
-                f"{server['GuildId']}",
-                f"{server['GuildName']}",
-                f"{server['ChannelName']}",
+                f"{server.guild_id}",
+                server.guild_name,
+                server.channel_name,
                 status_display
             )
 
-        console.print(server_table)
\ No newline at end of file
+        console.print(server_table)
+
+def _convert_timestamps(target: Selfbot | Server, convert: Callable[[float], float]) -> Selfbot | Server:
+    """Return a copy of `target` with its timestamps converted, the unset ones (-1) are kept."""
+
+    changes = {
+        name: round(convert(getattr(target, name)))
+        for name in TIMESTAMP_FIELDS if getattr(target, name, -1) > 0
+    }
+    return dataclasses.replace(target, **changes)
+
+def backoff_delay(failure_count: int) -> int:
+    """Return the seconds a target is parked after `failure_count` consecutive failures."""
+    return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** max(0, failure_count - 1))
+
+def _park(target: Selfbot | Server, reason: str, now: float) -> int:
+    target.failure_count += 1
+    target.failure_reason = reason
+    delay = backoff_delay(target.failure_count)
+    target.backoff_until = round(now) + delay
+    return delay
+
+def _unpark(target: Selfbot | Server) -> bool:
+    if target.failure_count == 0 and target.backoff_until == -1:
+        return False
+    target.failure_count = 0
+    target.backoff_until = -1
+    target.failure_reason = ""
+    return True
+
+def _parked_display(target: Selfbot | Server, now: float) -> str:
+    minutes = max(1, round((target.backoff_until - now) / 60))
+    return f"[red]Parked {minutes} min: {target.failure_reason} ({target.failure_count} failures)[/]"
@@ -0,0 +1,110 @@
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+import queue
+import sys
+from typing import Optional
+
+# Format of the plain text log lines
+PLAIN_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# Size after which the log file is rotated, in bytes
+LOG_MAX_BYTES = 10 * 1024 * 1024
+# Number of rotated log files kept
+LOG_BACKUP_COUNT = 5
+
+_pipeline: Optional["LogPipeline"] = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, for log collectors."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "Timestamp": record.created,
+            "Level": record.levelname,
+            "Logger": record.name,
+            "Message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["Exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class _LocalQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the records stay in the process: they are passed as they are, so
+        # the caller doesn't format them and the tracebacks reach the handlers
+        return record
+
+class LogPipeline():
+    """
+    Moves the formatting and the writing of the logs to a background thread.
+
+    Once started, the root logger only puts the records in a queue, and a
+    `QueueListener` thread passes them to the real handlers. A log call thus
+    costs the same whatever the handlers do, such as rendering a Rich line
+    or rotating a file.
+    """
+
+    def __init__(self, handlers: list[logging.Handler], level: int = logging.INFO):
+        self.handlers = handlers
+        self.level = level
+        self._queue: queue.Queue = queue.Queue()
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+
+    def start(self):
+        """Replace the handlers of the root logger with the queue."""
+
+        global _pipeline
+        root = logging.getLogger()
+        root.handlers = [_LocalQueueHandler(self._queue)]
+        root.setLevel(self.level)
+        self._listener.start()
+        _pipeline = self
+
+    def flush(self):
+        """Wait until the records logged so far are written."""
+        self._queue.join()
+
+    def stop(self):
+        """Write the remaining records, then stop the thread and close the handlers."""
+
+        global _pipeline
+        self._listener.stop()
+        for handler in self.handlers:
+            handler.close()
+        if _pipeline is self:
+            _pipeline = None
+
+def build_handler(log_format: str = "plain", path: Optional[Path] = None,
+                  max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT) -> logging.Handler:
+    """
+    Build a handler writing plain text or JSON lines, for the headless runs.
+
+    Parameters
+    ----------
+    log_format : str, optional
+        "plain" (default) or "json".
+    path : Path, optional
+        The log file, rotated at `max_bytes`. The logs are written to stderr
+        if None.
+    max_bytes : int, optional
+        The size after which the log file is rotated.
+    backup_count : int, optional
+        The number of rotated log files kept.
+    """
+
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler: logging.Handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(PLAIN_FORMAT))
+    return handler
+
+def flush_logs():
+    """Wait until the records logged so far are written, before the console is used directly."""
+
+    if _pipeline is not None:
+        _pipeline.flush()
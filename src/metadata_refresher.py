@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.json_manager import DataManager
+    from src.session_pool import SessionPool
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two name refreshes, to limit the requests sent
+REFRESH_INTERVAL = 30
+# Seconds before retrying a server whose names could not be refreshed
+FAILED_REFRESH_DELAY = 3600
+
+class MetadataRefresher():
+    """
+    Refreshes the server and channel names in the background.
+
+    Names are refreshed one server at a time, at most once every
+    `REFRESH_INTERVAL` seconds, when their TTL has expired. Only already
+    connected sessions are used, so the refresh never opens a connection.
+    """
+
+    def __init__(self, data_manager: "DataManager", sessions: "SessionPool"):
+        self.data_manager = data_manager
+        self.sessions = sessions
+        self._failed_attempts: dict[int, float] = {}
+
+    async def run(self):
+        """Refresh outdated names until cancelled."""
+
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            try:
+                await self.refresh_next()
+            except Exception as e:
+                logger.error(f"Error while refreshing server names: {e}")
+
+    async def refresh_next(self) -> bool:
+        """
+        Refresh the names of the first server whose TTL has expired.
+
+        Returns
+        -------
+        bool
+            True if a server was refreshed, False otherwise.
+        """
+
+        sessions = self.sessions.alive_sessions()
+        if not sessions:
+            return False
+
+        now = self.data_manager.clock.time()
+        server = next((
+            server for server in self.data_manager.servers.values()
+            if server.are_names_outdated(now)
+            and self._failed_attempts.get(server.guild_id, 0) + FAILED_REFRESH_DELAY <= now
+        ), None)
+        if server is None:
+            return False
+
+        refreshed_at = server.names_refreshed_at
+        for session in sessions:
+            await self.data_manager.update_server(server.guild_id, session)
+            if server.names_refreshed_at != refreshed_at:
+                self._failed_attempts.pop(server.guild_id, None)
+                return True
+
+        logger.warning(f"Could not refresh the names of server {server.guild_id}.")
+        self._failed_attempts[server.guild_id] = now
+        return False
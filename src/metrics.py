@@ -0,0 +1,237 @@
+import asyncio
+from contextlib import contextmanager
+import logging
+import math
+import time
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# Local port of the Prometheus endpoint, None to disable it
+METRICS_PORT = 9464
+# Upper bounds, in seconds, of the histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Counter():
+    """
+    A monotonically increasing value per combination of labels.
+
+    Attributes
+    ----------
+    name : str
+        The metric name.
+    documentation : str
+        The help text of the metric.
+    labelnames : tuple[str, ...]
+        The names of the labels, given in this order to `inc`.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram():
+    """
+    The distribution of observed values, in cumulative buckets, per combination of labels.
+
+    Attributes
+    ----------
+    name : str
+        The metric name.
+    documentation : str
+        The help text of the metric.
+    labelnames : tuple[str, ...]
+        The names of the labels, given in this order to `observe`.
+    buckets : tuple[float, ...]
+        The upper bounds of the buckets, in increasing order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # per labels: count of each bucket (not cumulative), then the +Inf bucket
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels):
+        key = _label_key(self.labelnames, labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        counts[index] += 1
+        self._sums[key] += value
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        """Observe the duration of the `with` block, in seconds."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                labels = _format_labels(self.labelnames + ("le",), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry():
+    """The metrics of the program, rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class MetricsServer():
+    """
+    Serves the metrics of a registry over HTTP, at `/metrics`, on the local host only.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = METRICS_PORT, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.port = port
+        self.host = host
+
+    async def serve(self):
+        """Serve until cancelled. A port already in use is logged and ignored."""
+
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            logger.warning(f"Metrics endpoint disabled, could not listen on {self.host}:{self.port}: {e}")
+            return
+
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # the headers are not needed
+            while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = self.registry.render_prometheus().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def _label_key(labelnames: tuple[str, ...], labels: tuple) -> tuple[str, ...]:
+    if len(labels) != len(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {labels}.")
+    return tuple(str(label) for label in labels)
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = (f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values))
+    return "{" + ",".join(pairs) + "}"
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+REGISTRY = MetricsRegistry()
+
+CONNECT_SECONDS = REGISTRY.histogram(
+    "autobumper_connect_seconds", "Time to connect a selfbot session to the gateway."
+)
+COMMAND_LOOKUPS = REGISTRY.counter(
+    "autobumper_command_lookups_total", "Lookups of the /bump command, by cache result.", ("cache",)
+)
+COMMAND_LOOKUP_SECONDS = REGISTRY.histogram(
+    "autobumper_command_lookup_seconds", "Time to look up the /bump command of a channel on Discord."
+)
+COMMAND_SEND_SECONDS = REGISTRY.histogram(
+    "autobumper_command_send_seconds", "Time for Discord to acknowledge the /bump command."
+)
+RESPONSE_WAIT_SECONDS = REGISTRY.histogram(
+    "autobumper_response_wait_seconds", "Time waiting for the reply of Disboard."
+)
+STORAGE_WRITE_SECONDS = REGISTRY.histogram(
+    "autobumper_storage_write_seconds", "Time to persist one record, or to commit a batch (\"commit\"), by kind.", ("kind",)
+)
+BUMP_OUTCOMES = REGISTRY.counter(
+    "autobumper_bump_outcomes_total", "Bump attempts by server and outcome.", ("guild_id", "outcome")
+)
+SCHEDULER_WAKEUPS = REGISTRY.counter(
+    "autobumper_scheduler_wakeups_total", "Wake-ups of the bump loop, by cause.", ("cause",)
+)
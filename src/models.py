@@ -0,0 +1,278 @@
+from dataclasses import dataclass
+from typing import Any
+
+# Version of the JSON documents written by JsonStorage.
+# Version 1 files are the bare dict/list written by older versions.
+# Version 3 adds the optional "NamesRefreshedAt" and "MetadataTtl" server keys.
+# Version 4 adds the optional "FailureCount", "BackoffUntil" and "FailureReason" keys.
+SCHEMA_VERSION = 4
+
+# Default seconds between two refreshes of the names of a server
+DEFAULT_METADATA_TTL = 24 * 3600
+
+class SchemaError(ValueError):
+    """Raised when stored data does not match the expected schema."""
+
+@dataclass(slots=True)
+class Selfbot:
+    """
+    A registered selfbot account.
+
+    Attributes
+    ----------
+    id : int
+        The ID of the user account.
+    token : str
+        The authentication token of the account.
+    name : str
+        The username of the account.
+    next_bump_timestamp : int
+        The timestamp after which the account can bump again, -1 if never used.
+    failure_count : int
+        The number of consecutive failures to connect the account.
+    backoff_until : int
+        The timestamp before which the failing account is not used, -1 if none.
+    failure_reason : str
+        The reason of the last failure, empty if none.
+    """
+
+    id: int
+    token: str
+    name: str
+    next_bump_timestamp: int = -1
+    failure_count: int = 0
+    backoff_until: int = -1
+    failure_reason: str = ""
+
+    def next_attempt_timestamp(self) -> int:
+        """Return the timestamp after which the account can be used."""
+        return max(self.next_bump_timestamp, self.backoff_until)
+
+    @classmethod
+    def from_dict(cls, id: int | str, data: dict[str, Any]) -> "Selfbot":
+        """
+        Build and validate a selfbot from its stored representation.
+
+        Raises
+        ------
+        SchemaError
+            If a key is missing or has a wrong type.
+        """
+
+        return cls(
+            id=_as_id(id, "selfbot ID"),
+            token=_field(data, "Token", str),
+            name=_field(data, "Name", str),
+            next_bump_timestamp=_field(data, "NextBumpTimestamp", int),
+            failure_count=_optional_field(data, "FailureCount", int, 0),
+            backoff_until=_optional_field(data, "BackoffUntil", int, -1),
+            failure_reason=_optional_field(data, "FailureReason", str, ""),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the stored representation of the selfbot, without its ID."""
+        return {
+            "Token": self.token,
+            "Name": self.name,
+            "NextBumpTimestamp": self.next_bump_timestamp,
+            "FailureCount": self.failure_count,
+            "BackoffUntil": self.backoff_until,
+            "FailureReason": self.failure_reason
+        }
+
+@dataclass(slots=True)
+class Server:
+    """
+    A registered server and the channel where it is bumped.
+
+    Attributes
+    ----------
+    guild_id : int
+        The ID of the server.
+    guild_name : str
+        The name of the server.
+    channel_id : int
+        The ID of the bump channel, -1 if none.
+    channel_name : str
+        The name of the bump channel.
+    next_bump_timestamp : int
+        The timestamp after which the server can be bumped again, -1 if never bumped.
+    names_refreshed_at : int
+        The timestamp of the last refresh of the server and channel names.
+    metadata_ttl : int
+        The seconds after which the names should be refreshed again.
+    failure_count : int
+        The number of consecutive bump attempts without a reply of Disboard.
+    backoff_until : int
+        The timestamp before which the failing server is not attempted, -1 if none.
+    failure_reason : str
+        The reason of the last failure, empty if none.
+    """
+
+    guild_id: int
+    guild_name: str
+    channel_id: int
+    channel_name: str
+    next_bump_timestamp: int = -1
+    names_refreshed_at: int = -1
+    metadata_ttl: int = DEFAULT_METADATA_TTL
+    failure_count: int = 0
+    backoff_until: int = -1
+    failure_reason: str = ""
+
+    def are_names_outdated(self, now: float) -> bool:
+        """Check if the names of the server should be refreshed."""
+        return self.names_refreshed_at + self.metadata_ttl <= now
+
+    def next_attempt_timestamp(self) -> int:
+        """Return the timestamp after which the server can be attempted."""
+        return max(self.next_bump_timestamp, self.backoff_until)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Server":
+        """
+        Build and validate a server from its stored representation.
+
+        Raises
+        ------
+        SchemaError
+            If a key is missing or has a wrong type.
+        """
+
+        return cls(
+            guild_id=_as_id(_field(data, "GuildId", int), "guild ID"),
+            guild_name=_field(data, "GuildName", str),
+            channel_id=_field(data, "ChannelId", int),
+            channel_name=_field(data, "ChannelName", str),
+            next_bump_timestamp=_field(data, "NextBumpTimestamp", int),
+            names_refreshed_at=_optional_field(data, "NamesRefreshedAt", int, -1),
+            metadata_ttl=_optional_field(data, "MetadataTtl", int, DEFAULT_METADATA_TTL),
+            failure_count=_optional_field(data, "FailureCount", int, 0),
+            backoff_until=_optional_field(data, "BackoffUntil", int, -1),
+            failure_reason=_optional_field(data, "FailureReason", str, ""),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the stored representation of the server."""
+        return {
+            "GuildId": self.guild_id,
+            "GuildName": self.guild_name,
+            "ChannelId": self.channel_id,
+            "ChannelName": self.channel_name,
+            "NextBumpTimestamp": self.next_bump_timestamp,
+            "NamesRefreshedAt": self.names_refreshed_at,
+            "MetadataTtl": self.metadata_ttl,
+            "FailureCount": self.failure_count,
+            "BackoffUntil": self.backoff_until,
+            "FailureReason": self.failure_reason
+        }
+
+@dataclass(slots=True)
+class PendingAttempt:
+    """
+    A bump command which may have been sent, and whose outcome is not recorded yet.
+
+    Attributes
+    ----------
+    guild_id : int
+        The ID of the bumped server.
+    selfbot_id : int
+        The ID of the account sending the command.
+    sent_at : int
+        The timestamp just before the command was sent.
+    """
+
+    guild_id: int
+    selfbot_id: int
+    sent_at: int
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PendingAttempt":
+        """
+        Build and validate a pending attempt from its stored representation.
+
+        Raises
+        ------
+        SchemaError
+            If a key is missing or has a wrong type.
+        """
+
+        return cls(
+            guild_id=_as_id(_field(data, "GuildId", int), "guild ID"),
+            selfbot_id=_as_id(_field(data, "SelfbotId", int), "selfbot ID"),
+            sent_at=_field(data, "SentAt", int),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the stored representation of the pending attempt."""
+        return {
+            "GuildId": self.guild_id,
+            "SelfbotId": self.selfbot_id,
+            "SentAt": self.sent_at
+        }
+
+def migrate_selfbots_document(document: Any) -> dict[str, dict[str, Any]]:
+    """
+    Return the selfbot entries of a selfbots.json document of any version.
+
+    Raises
+    ------
+    SchemaError
+        If the document has an unknown format or version.
+    """
+
+    if isinstance(document, dict) and "SchemaVersion" not in document:
+        # version 1: bare dict keyed by account ID
+        return document
+    _check_version(document)
+    selfbots = document.get("Selfbots")
+    if not isinstance(selfbots, dict):
+        raise SchemaError("'Selfbots' must be an object.")
+    return selfbots
+
+def migrate_servers_document(document: Any) -> list[dict[str, Any]]:
+    """
+    Return the server entries of a servers.json document of any version.
+
+    Raises
+    ------
+    SchemaError
+        If the document has an unknown format or version.
+    """
+
+    if isinstance(document, list):
+        # version 1: bare list of servers
+        return document
+    _check_version(document)
+    servers = document.get("Servers")
+    if not isinstance(servers, list):
+        raise SchemaError("'Servers' must be a list.")
+    return servers
+
+def _check_version(document: Any):
+    if not isinstance(document, dict):
+        raise SchemaError("Unknown document format.")
+    version = document.get("SchemaVersion")
+    if not isinstance(version, int) or version > SCHEMA_VERSION:
+        raise SchemaError(f"Unsupported schema version: {version}")
+
+def _field(data: dict[str, Any], key: str, expected_type: type):
+    if not isinstance(data, dict) or key not in data:
+        raise SchemaError(f"Missing key '{key}'.")
+    value = data[key]
+    # bool is a subclass of int but never a valid value here
+    if not isinstance(value, expected_type) or isinstance(value, bool):
+        raise SchemaError(f"'{key}' must be of type {expected_type.__name__}, got {type(value).__name__}.")
+    return value
+
+def _optional_field(data: dict[str, Any], key: str, expected_type: type, default):
+    if key not in data:
+        return default
+    return _field(data, key, expected_type)
+
+def _as_id(value: int | str, label: str) -> int:
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise SchemaError(f"Invalid {label}: {value!r}")
+    return value
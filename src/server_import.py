@@ -0,0 +1,186 @@
+import asyncio
+import csv
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from rich.table import Table
+from rich import box
+
+from src.console import console
+from src.models import Server
+
+if TYPE_CHECKING:
+    from src.autobump_selfbot_service import AutoBumpSelfbotService
+
+# Names resolved at the same time during an import
+IMPORT_CONCURRENCY = 5
+
+@dataclass(slots=True)
+class ImportRow:
+    """
+    One server of an import file.
+
+    Attributes
+    ----------
+    row : int
+        The line of the row in a CSV file, or its position in a JSON list,
+        starting at 1.
+    guild_id : int or None
+        The ID of the server, None if it could not be read.
+    channel_id : int or None
+        The ID of the bump channel, None if it could not be read.
+    error : str or None
+        Why the server was not imported, None if it was.
+    """
+
+    row: int
+    guild_id: Optional[int]
+    channel_id: Optional[int]
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"Row": self.row, "GuildId": self.guild_id, "ChannelId": self.channel_id, "Error": self.error}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ImportRow":
+        return cls(int(data["Row"]), data.get("GuildId"), data.get("ChannelId"), data.get("Error"))
+
+def read_import_file(path: Path) -> list[ImportRow]:
+    """
+    Read the servers to import from a CSV or JSON file.
+
+    A CSV file has one `guild_id,channel_id` pair per line, with an optional
+    header; empty lines and lines starting with "#" are skipped. A JSON file
+    holds a list of `{"GuildId": ..., "ChannelId": ...}` objects. The rows
+    which can't be read are returned with their error.
+
+    Raises
+    ------
+    OSError
+        If the file can't be read.
+    ValueError
+        If a JSON file is not a list.
+    """
+
+    with open(path, "r", encoding='utf-8', newline="") as file:
+        if path.suffix.lower() == ".json":
+            entries = json.load(file)
+            if not isinstance(entries, list):
+                raise ValueError("The JSON file must contain a list of servers.")
+            return [_json_row(index + 1, entry) for index, entry in enumerate(entries)]
+
+        rows = []
+        first_line = True
+        reader = csv.reader(file)
+        for cells in reader:
+            cells = [cell.strip() for cell in cells]
+            if not any(cells) or cells[0].startswith("#"):
+                continue
+            if first_line and not cells[0].isdigit():
+                # a header, after the comments and the empty lines
+                first_line = False
+                continue
+            first_line = False
+            rows.append(_csv_row(reader.line_num, cells))
+        return rows
+
+def _csv_row(line: int, cells: list[str]) -> ImportRow:
+    if len(cells) < 2:
+        return ImportRow(line, None, None, "expected a server ID and a channel ID")
+    guild_id, channel_id = _parse_id(cells[0]), _parse_id(cells[1])
+    if guild_id is None or channel_id is None:
+        return ImportRow(line, None, None, f"invalid IDs: {cells[0]!r}, {cells[1]!r}")
+    return ImportRow(line, guild_id, channel_id)
+
+def _json_row(index: int, entry: Any) -> ImportRow:
+    if not isinstance(entry, dict) or "GuildId" not in entry or "ChannelId" not in entry:
+        return ImportRow(index, None, None, "expected an object with a GuildId and a ChannelId")
+    guild_id, channel_id = _parse_id(entry["GuildId"]), _parse_id(entry["ChannelId"])
+    if guild_id is None or channel_id is None:
+        return ImportRow(index, None, None, f"invalid IDs: {entry['GuildId']!r}, {entry['ChannelId']!r}")
+    return ImportRow(index, guild_id, channel_id)
+
+def _parse_id(value: Any) -> Optional[int]:
+    """Return a Discord ID given as a positive integer or a string of digits, None otherwise."""
+
+    # bool is a subclass of int but never an ID, and a float would be truncated
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if value > 0 else None
+    if isinstance(value, str) and value.isdigit() and value.isascii():
+        return int(value) or None
+    return None
+
+async def resolve_servers(rows: list[ImportRow], selfbot_service: "AutoBumpSelfbotService",
+                          registered: set[int], now: float, concurrency: int = IMPORT_CONCURRENCY) -> list[Server]:
+    """
+    Resolve the names of the rows to import with one session.
+
+    The rows are checked and resolved at most `concurrency` at a time. The
+    `error` of the rows which can't be imported is set.
+
+    Parameters
+    ----------
+    rows : list[ImportRow]
+        The rows read from the import file.
+    selfbot_service : AutoBumpSelfbotService
+        A connected session with access to the servers.
+    registered : set[int]
+        The IDs of the servers already registered.
+    now : float
+        The current timestamp, recorded as the time the names were refreshed.
+    concurrency : int, optional
+        The maximum number of rows resolved at the same time.
+
+    Returns
+    -------
+    list[Server]
+        The servers to register, in the order of the rows.
+    """
+
+    seen: dict[int, int] = {}
+    pending = []
+    for row in rows:
+        if row.error is not None:
+            continue
+        if row.guild_id in registered:
+            row.error = "already registered"
+        elif row.guild_id in seen:
+            row.error = f"duplicate of row {seen[row.guild_id]}"
+        else:
+            seen[row.guild_id] = row.row
+            pending.append(row)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(row: ImportRow) -> Optional[Server]:
+        async with semaphore:
+            guild_name = await selfbot_service.get_guild_name(row.guild_id)
+            if guild_name is None:
+                row.error = "server not found"
+                return None
+            channel_name = await selfbot_service.get_channel_name(row.channel_id)
+            if channel_name is None:
+                row.error = "channel not found"
+                return None
+        return Server(row.guild_id, guild_name, row.channel_id, channel_name, names_refreshed_at=round(now))
+
+    servers = await asyncio.gather(*(resolve(row) for row in pending))
+    return [server for server in servers if server is not None]
+
+def display_import_report(rows: list[ImportRow]):
+    """Print the rows which could not be imported and the number imported."""
+
+    failed = [row for row in rows if row.error is not None]
+    if failed:
+        table = Table(title="Rows not imported", box=box.ROUNDED)
+        for column, style in (("Row", "white"), ("Server ID", "cyan"), ("Channel ID", "magenta"), ("Error", "red")):
+            table.add_column(column, style=style)
+        for row in failed:
+            table.add_row(
+                str(row.row), str(row.guild_id) if row.guild_id is not None else "-",
+                str(row.channel_id) if row.channel_id is not None else "-", row.error
+            )
+        console.print(table)
+    console.print(f"{len(rows) - len(failed)} of {len(rows)} servers imported.")
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.autobump_selfbot_service import AutoBumpSelfbotService
+    from src.json_manager import DataManager
+
+logger = logging.getLogger(__name__)
+
+class SessionPool():
+    """
+    Keeps one long-lived selfbot session per registered account.
+
+    Sessions are started lazily the first time an account is needed and are
+    reused across bump attempts. A session is only restarted when it is no
+    longer connected. The bump loop and the control commands use the pool at
+    the same time: the sessions of an account are started and closed under a
+    lock, so that two callers never log in the same account twice.
+
+    Attributes
+    ----------
+    data_manager : DataManager
+        The data manager used to start the sessions.
+    """
+
+    def __init__(self, data_manager: "DataManager"):
+        self.data_manager = data_manager
+        self._sessions: dict[int, "AutoBumpSelfbotService"] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def __contains__(self, selfbot_id: int) -> bool:
+        return selfbot_id in self._sessions
+
+    async def get(self, selfbot_id: int) -> "AutoBumpSelfbotService | None":
+        """
+        Return the connected session of an account, starting it if needed.
+
+        Parameters
+        ----------
+        selfbot_id : int
+            The id of the selfbot user account.
+
+        Returns
+        -------
+        AutoBumpSelfbotService or None
+            The connected session, or None if the account could not connect.
+        """
+
+        session = self._sessions.get(selfbot_id)
+        if session is not None and session.is_alive():
+            return session
+
+        async with self._lock(selfbot_id):
+            # another caller may have started it while this one waited
+            session = self._sessions.get(selfbot_id)
+            if session is not None:
+                if session.is_alive():
+                    return session
+
+                logger.warning(f"Session of selfbot {selfbot_id} was disconnected. Reconnecting...")
+                await self._close(selfbot_id)
+
+            try:
+                session = await self.data_manager.update_and_start_selfbot_service(selfbot_id)
+            except Exception as e:
+                logger.error(f"Could not start session of selfbot {selfbot_id}: {e}")
+                return None
+
+            if session is not None:
+                self._sessions[selfbot_id] = session
+            return session
+
+    def _lock(self, selfbot_id: int) -> asyncio.Lock:
+        lock = self._locks.get(selfbot_id)
+        if lock is None:
+            lock = self._locks[selfbot_id] = asyncio.Lock()
+        return lock
+
+    def alive_sessions(self) -> list["AutoBumpSelfbotService"]:
+        """Return the sessions which are currently connected, without starting any."""
+        return [session for session in self._sessions.values() if session.is_alive()]
+
+    def connected_ids(self) -> set[int]:
+        """Return the IDs of the accounts whose session is connected."""
+        return {selfbot_id for selfbot_id, session in self._sessions.items() if session.is_alive()}
+
+    async def adopt(self, selfbot_id: int, session: "AutoBumpSelfbotService"):
+        """
+        Add an already connected session to the pool.
+
+        If the account already has a session, the new one is stopped and the
+        existing one is kept.
+        """
+
+        async with self._lock(selfbot_id):
+            if selfbot_id in self._sessions:
+                if self._sessions[selfbot_id] is not session:
+                    await session.stop()
+                return
+            self._sessions[selfbot_id] = session
+
+    async def close(self, selfbot_id: int):
+        """Stop and forget the session of an account, if any."""
+
+        async with self._lock(selfbot_id):
+            await self._close(selfbot_id)
+
+    async def _close(self, selfbot_id: int):
+        session = self._sessions.pop(selfbot_id, None)
+        if session is not None:
+            await session.stop()
+
+    async def close_all(self, timeout: float | None = None) -> list[int]:
+        """
+        Stop every session of the pool at the same time.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum seconds to wait for all the sessions together. The ones
+            still closing after it are abandoned: their task is cancelled.
+
+        Returns
+        -------
+        list[int]
+            The IDs of the accounts whose session did not close in time.
+        """
+
+        sessions, self._sessions = self._sessions, {}
+        if not sessions:
+            return []
+
+        stopping = {asyncio.create_task(session.stop()): selfbot_id for selfbot_id, session in sessions.items()}
+        _, pending = await asyncio.wait(stopping, timeout=timeout)
+        for task in pending:
+            task.cancel()
+            sessions[stopping[task]].abort()
+        return sorted(stopping[task] for task in pending)
@@ -0,0 +1,650 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Iterator
+
+from src.console import console
+from src.models import (
+    DEFAULT_METADATA_TTL, SCHEMA_VERSION, PendingAttempt, SchemaError, Selfbot, Server,
+    migrate_selfbots_document, migrate_servers_document
+)
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SCHEMA_VERSION = 4
+
+class StorageBackend(ABC):
+    """
+    Persistent storage of the selfbots and servers.
+
+    Writes are row-level: each method persists one selfbot or one server.
+    Writes made inside `transaction` are committed together when the outermost
+    transaction exits, or discarded if it raises.
+    """
+
+    @abstractmethod
+    def load_selfbots(self) -> list[Selfbot]:
+        """Return the selfbots in registration order."""
+
+    @abstractmethod
+    def load_servers(self) -> list[Server]:
+        """Return the servers in the user's order."""
+
+    @abstractmethod
+    def save_selfbot(self, selfbot: Selfbot):
+        """Insert or update one selfbot."""
+
+    @abstractmethod
+    def delete_selfbot(self, selfbot_id: int):
+        """Delete one selfbot."""
+
+    @abstractmethod
+    def save_server(self, server: Server):
+        """Insert or update one server. New servers are placed last."""
+
+    @abstractmethod
+    def delete_server(self, guild_id: int):
+        """Delete one server."""
+
+    @abstractmethod
+    def save_server_order(self, guild_ids: list[int]):
+        """Persist the order of the servers."""
+
+    @abstractmethod
+    def load_pending_attempts(self) -> list[PendingAttempt]:
+        """Return the attempts of the journal, whose outcome was not recorded."""
+
+    @abstractmethod
+    def save_pending_attempt(self, attempt: PendingAttempt):
+        """Add an attempt to the journal, replacing the previous one of its server."""
+
+    @abstractmethod
+    def delete_pending_attempt(self, guild_id: int):
+        """Remove the attempt of a server from the journal."""
+
+    @abstractmethod
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group the writes made inside the block into one atomic write."""
+
+    def reload(self):
+        """
+        Forget what is cached in memory, so the next loads read the changes made by another program.
+
+        Raises
+        ------
+        SchemaError
+            If the changed data can't be read. The cached data is kept.
+        """
+
+    @abstractmethod
+    def changed_externally(self) -> bool:
+        """Return True if another program changed the data since it was last loaded."""
+
+    @abstractmethod
+    def watched_paths(self) -> list[Path]:
+        """Return the files changed by a write to the storage."""
+
+    def close(self):
+        """Flush pending writes and release the storage."""
+
+class JsonStorage(StorageBackend):
+    """
+    Stores the data in `selfbots.json` and `servers.json`, and the journal of
+    the attempts in flight in `pending_attempts.json`.
+
+    Each file is rewritten entirely on change, through a temporary file and an
+    atomic rename so a crash never leaves a truncated file behind. Files written
+    by older versions are migrated to the current schema version on load, and
+    invalid entries are skipped.
+
+    A file edited by another program since it was read is not overwritten with
+    the data in memory: only the entries changed here are written over the
+    edited file, and the file stays reported as changed externally, so that
+    the edit is reloaded.
+    """
+
+    def __init__(self, data_dir: Path):
+        self._selfbots_path = data_dir / "selfbots.json"
+        self._servers_path = data_dir / "servers.json"
+        self._pending_path = data_dir / "pending_attempts.json"
+
+        self._selfbots: dict[int, dict[str, str | int]] = {}
+        self._servers: dict[int, dict[str, int | str]] = {}
+        self._signatures = self._file_signatures()
+        self._load()
+        self._pending = self._load_pending()
+
+        self._depth = 0
+        self._selfbots_dirty = False
+        self._servers_dirty = False
+        self._pending_dirty = False
+        # entries saved or deleted since the last write, merged into an edited file
+        self._changed_selfbots: set[int] = set()
+        self._changed_servers: set[int] = set()
+        self._servers_reordered = False
+
+    def _load(self, strict: bool = False):
+        """
+        Read the files. Invalid files and entries are skipped, or raise a
+        `SchemaError` if `strict`, without changing the loaded data.
+        """
+
+        selfbots = self._read_selfbots(strict)
+        servers = self._read_servers(strict)
+        self._selfbots = selfbots
+        self._servers = servers
+
+    def _read_selfbots(self, strict: bool = False) -> dict[int, dict[str, str | int]]:
+        selfbots_document = _read_json(self._selfbots_path, {}, strict)
+        selfbots = {}
+        try:
+            entries = migrate_selfbots_document(selfbots_document)
+        except SchemaError as e:
+            if strict:
+                raise
+            console.print(f"Error loading file: {self._selfbots_path} ({e})")
+            entries = {}
+        for selfbot_id, data in entries.items():
+            try:
+                selfbot = Selfbot.from_dict(selfbot_id, data)
+            except SchemaError as e:
+                if strict:
+                    raise SchemaError(f"Invalid selfbot {selfbot_id} in {self._selfbots_path}: {e}") from e
+                console.print(f"Invalid selfbot {selfbot_id} ignored in {self._selfbots_path}: {e}")
+                continue
+            selfbots[selfbot.id] = selfbot.to_dict()
+        return selfbots
+
+    def _read_servers(self, strict: bool = False) -> dict[int, dict[str, int | str]]:
+        servers_document = _read_json(self._servers_path, [], strict)
+        servers = {}
+        try:
+            entries = migrate_servers_document(servers_document)
+        except SchemaError as e:
+            if strict:
+                raise
+            console.print(f"Error loading file: {self._servers_path} ({e})")
+            entries = []
+        for data in entries:
+            try:
+                server = Server.from_dict(data)
+            except SchemaError as e:
+                if strict:
+                    raise SchemaError(f"Invalid server in {self._servers_path}: {e}") from e
+                console.print(f"Invalid server ignored in {self._servers_path}: {e}")
+                continue
+            servers[server.guild_id] = server.to_dict()
+        return servers
+
+    def _load_pending(self) -> dict[int, dict[str, int]]:
+        """Read the journal. It only holds provisional data: an invalid one is ignored."""
+
+        document = _read_json(self._pending_path, {"SchemaVersion": SCHEMA_VERSION, "Attempts": []})
+        pending = {}
+        try:
+            if not isinstance(document, dict) or not isinstance(document.get("Attempts"), list):
+                raise SchemaError("Unknown document format.")
+            for data in document["Attempts"]:
+                attempt = PendingAttempt.from_dict(data)
+                pending[attempt.guild_id] = attempt.to_dict()
+        except SchemaError as e:
+            logger.warning(f"Ignoring the invalid journal {self._pending_path}: {e}")
+            return {}
+        return pending
+
+    def _file_signatures(self) -> dict[Path, tuple[int, int, int] | None]:
+        return {path: _file_signature(path) for path in (self._selfbots_path, self._servers_path)}
+
+    def reload(self):
+        # taken before reading, so that a file changed again while read is read again
+        self._signatures = self._file_signatures()
+        self._load(strict=True)
+
+    def changed_externally(self) -> bool:
+        return self._file_signatures() != self._signatures
+
+    def watched_paths(self) -> list[Path]:
+        return [self._selfbots_path, self._servers_path]
+
+    def load_selfbots(self) -> list[Selfbot]:
+        return [Selfbot.from_dict(selfbot_id, data) for selfbot_id, data in self._selfbots.items()]
+
+    def load_servers(self) -> list[Server]:
+        return [Server.from_dict(data) for data in self._servers.values()]
+
+    def save_selfbot(self, selfbot: Selfbot):
+        self._selfbots[selfbot.id] = selfbot.to_dict()
+        self._changed_selfbots.add(selfbot.id)
+        self._selfbots_dirty = True
+        self._flush()
+
+    def delete_selfbot(self, selfbot_id: int):
+        if self._selfbots.pop(selfbot_id, None) is not None:
+            self._changed_selfbots.add(selfbot_id)
+            self._selfbots_dirty = True
+            self._flush()
+
+    def save_server(self, server: Server):
+        self._servers[server.guild_id] = server.to_dict()
+        self._changed_servers.add(server.guild_id)
+        self._servers_dirty = True
+        self._flush()
+
+    def delete_server(self, guild_id: int):
+        if self._servers.pop(guild_id, None) is not None:
+            self._changed_servers.add(guild_id)
+            self._servers_dirty = True
+            self._flush()
+
+    def load_pending_attempts(self) -> list[PendingAttempt]:
+        return [PendingAttempt.from_dict(data) for data in self._pending.values()]
+
+    def save_pending_attempt(self, attempt: PendingAttempt):
+        self._pending[attempt.guild_id] = attempt.to_dict()
+        self._pending_dirty = True
+        self._flush()
+
+    def delete_pending_attempt(self, guild_id: int):
+        if self._pending.pop(guild_id, None) is not None:
+            self._pending_dirty = True
+            self._flush()
+
+    def save_server_order(self, guild_ids: list[int]):
+        self._servers = {guild_id: self._servers[guild_id] for guild_id in guild_ids if guild_id in self._servers}
+        self._servers_reordered = True
+        self._servers_dirty = True
+        self._flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        # like a rollback, a failed batch leaves the data as it was and writes nothing
+        snapshot = self._snapshot() if self._depth == 0 else None
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            if snapshot is not None:
+                self._restore(snapshot)
+            raise
+        finally:
+            self._depth -= 1
+        self._flush()
+
+    def _snapshot(self) -> dict:
+        return {
+            "_selfbots": {key: dict(value) for key, value in self._selfbots.items()},
+            "_servers": {key: dict(value) for key, value in self._servers.items()},
+            "_pending": {key: dict(value) for key, value in self._pending.items()},
+            "_selfbots_dirty": self._selfbots_dirty,
+            "_servers_dirty": self._servers_dirty,
+            "_pending_dirty": self._pending_dirty,
+            "_changed_selfbots": set(self._changed_selfbots),
+            "_changed_servers": set(self._changed_servers),
+            "_servers_reordered": self._servers_reordered,
+        }
+
+    def _restore(self, snapshot: dict):
+        for name, value in snapshot.items():
+            setattr(self, name, value)
+
+    def close(self):
+        self._flush()
+
+    def _flush(self):
+        if self._depth > 0:
+            return
+        if self._selfbots_dirty:
+            edited = self._merge_edited_selfbots()
+            _write_json_atomic(self._selfbots_path, {
+                "SchemaVersion": SCHEMA_VERSION,
+                "Selfbots": {str(selfbot_id): selfbot for selfbot_id, selfbot in self._selfbots.items()}
+            })
+            self._selfbots_dirty = False
+            self._changed_selfbots.clear()
+            if not edited:
+                # our own writes are not changes made by another program
+                self._signatures[self._selfbots_path] = _file_signature(self._selfbots_path)
+        if self._servers_dirty:
+            edited = self._merge_edited_servers()
+            _write_json_atomic(self._servers_path, {
+                "SchemaVersion": SCHEMA_VERSION,
+                "Servers": list(self._servers.values())
+            })
+            self._servers_dirty = False
+            self._changed_servers.clear()
+            self._servers_reordered = False
+            if not edited:
+                self._signatures[self._servers_path] = _file_signature(self._servers_path)
+        # last, so that an outcome is saved before its attempt leaves the journal
+        if self._pending_dirty:
+            _write_json_atomic(self._pending_path, {
+                "SchemaVersion": SCHEMA_VERSION,
+                "Attempts": list(self._pending.values())
+            })
+            self._pending_dirty = False
+
+    def _merge_edited_selfbots(self) -> bool:
+        """
+        Apply the selfbots changed here over the file, if another program edited it.
+        Return True if it did, the file must then still be reloaded.
+        """
+
+        if _file_signature(self._selfbots_path) == self._signatures.get(self._selfbots_path):
+            return False
+        edited = self._read_edited(self._read_selfbots)
+        if edited is None:
+            return False
+        for selfbot_id in self._changed_selfbots:
+            if selfbot_id in self._selfbots:
+                edited[selfbot_id] = self._selfbots[selfbot_id]
+            else:
+                edited.pop(selfbot_id, None)
+        self._selfbots = edited
+        return True
+
+    def _merge_edited_servers(self) -> bool:
+        """
+        Apply the servers changed here over the file, if another program edited it.
+        Return True if it did, the file must then still be reloaded.
+        """
+
+        if _file_signature(self._servers_path) == self._signatures.get(self._servers_path):
+            return False
+        edited = self._read_edited(self._read_servers)
+        if edited is None:
+            return False
+        if self._servers_reordered:
+            order = list(self._servers) + [guild_id for guild_id in edited if guild_id not in self._servers]
+        else:
+            order = list(edited) + [guild_id for guild_id in self._servers if guild_id not in edited]
+        servers = {}
+        for guild_id in order:
+            if guild_id in self._changed_servers:
+                if guild_id in self._servers:
+                    servers[guild_id] = self._servers[guild_id]
+            elif guild_id in edited:
+                servers[guild_id] = edited[guild_id]
+        self._servers = servers
+        return True
+
+    def _read_edited(self, read: Callable[[bool], dict]) -> dict | None:
+        try:
+            return read(True)
+        except (SchemaError, OSError) as e:
+            # the current configuration is kept, as on a reload
+            logger.warning(f"Ignoring an invalid edit of the data files, it is overwritten: {e}")
+            return None
+
+class SqliteStorage(StorageBackend):
+    """
+    Stores the data in a SQLite database in WAL mode.
+
+    On creation, the database imports the existing `selfbots.json` and
+    `servers.json` of its directory once.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._depth = 0
+        self._migrate()
+        self._data_version = self._get_data_version()
+
+    def _migrate(self):
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SQLITE_SCHEMA_VERSION:
+            return
+
+        with self.transaction():
+            if version < 1:
+                self._create_tables()
+            if version < 2:
+                self._connection.execute(
+                    "ALTER TABLE servers ADD COLUMN names_refreshed_at INTEGER NOT NULL DEFAULT -1"
+                )
+                self._connection.execute(
+                    f"ALTER TABLE servers ADD COLUMN metadata_ttl INTEGER NOT NULL DEFAULT {DEFAULT_METADATA_TTL}"
+                )
+            if version < 3:
+                for table in ("selfbots", "servers"):
+                    self._connection.execute(
+                        f"ALTER TABLE {table} ADD COLUMN failure_count INTEGER NOT NULL DEFAULT 0"
+                    )
+                    self._connection.execute(
+                        f"ALTER TABLE {table} ADD COLUMN backoff_until INTEGER NOT NULL DEFAULT -1"
+                    )
+                    self._connection.execute(
+                        f"ALTER TABLE {table} ADD COLUMN failure_reason TEXT NOT NULL DEFAULT ''"
+                    )
+            if version < 4:
+                self._connection.execute("""
+                    CREATE TABLE IF NOT EXISTS pending_attempts (
+                        guild_id INTEGER PRIMARY KEY,
+                        selfbot_id INTEGER NOT NULL,
+                        sent_at INTEGER NOT NULL
+                    )
+                """)
+            if version < 1:
+                self._import_json(self._path.parent)
+            self._connection.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+
+    def _create_tables(self):
+        """Create the tables of the version 1 schema."""
+
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS selfbots (
+                id INTEGER PRIMARY KEY,
+                token TEXT NOT NULL,
+                name TEXT NOT NULL,
+                next_bump_timestamp INTEGER NOT NULL
+            )
+        """)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS servers (
+                guild_id INTEGER PRIMARY KEY,
+                position INTEGER NOT NULL,
+                guild_name TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                channel_name TEXT NOT NULL,
+                next_bump_timestamp INTEGER NOT NULL
+            )
+        """)
+
+    def _import_json(self, data_dir: Path):
+        """Import the data of the JSON files written by previous versions."""
+
+        legacy = JsonStorage(data_dir)
+        selfbots = legacy.load_selfbots()
+        servers = legacy.load_servers()
+        for selfbot in selfbots:
+            self.save_selfbot(selfbot)
+        for server in servers:
+            self.save_server(server)
+
+        if selfbots or servers:
+            logger.info(f"Imported {len(selfbots)} selfbots and {len(servers)} servers from JSON files.")
+
+    def load_selfbots(self) -> list[Selfbot]:
+        rows = self._connection.execute(
+            """
+            SELECT id, token, name, next_bump_timestamp, failure_count, backoff_until, failure_reason
+            FROM selfbots ORDER BY rowid
+            """
+        )
+        return [Selfbot(*row) for row in rows]
+
+    def load_servers(self) -> list[Server]:
+        rows = self._connection.execute(
+            """
+            SELECT guild_id, guild_name, channel_id, channel_name, next_bump_timestamp,
+                names_refreshed_at, metadata_ttl, failure_count, backoff_until, failure_reason
+            FROM servers ORDER BY position
+            """
+        )
+        return [Server(*row) for row in rows]
+
+    def save_selfbot(self, selfbot: Selfbot):
+        self._connection.execute(
+            """
+            INSERT INTO selfbots (
+                id, token, name, next_bump_timestamp, failure_count, backoff_until, failure_reason
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                token = excluded.token,
+                name = excluded.name,
+                next_bump_timestamp = excluded.next_bump_timestamp,
+                failure_count = excluded.failure_count,
+                backoff_until = excluded.backoff_until,
+                failure_reason = excluded.failure_reason
+            """,
+            (
+                selfbot.id, selfbot.token, selfbot.name, selfbot.next_bump_timestamp,
+                selfbot.failure_count, selfbot.backoff_until, selfbot.failure_reason
+            )
+        )
+
+    def delete_selfbot(self, selfbot_id: int):
+        self._connection.execute("DELETE FROM selfbots WHERE id = ?", (selfbot_id,))
+
+    def save_server(self, server: Server):
+        self._connection.execute(
+            """
+            INSERT INTO servers (
+                guild_id, position, guild_name, channel_id, channel_name, next_bump_timestamp,
+                names_refreshed_at, metadata_ttl, failure_count, backoff_until, failure_reason
+            )
+            VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM servers), ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                guild_name = excluded.guild_name,
+                channel_id = excluded.channel_id,
+                channel_name = excluded.channel_name,
+                next_bump_timestamp = excluded.next_bump_timestamp,
+                names_refreshed_at = excluded.names_refreshed_at,
+                metadata_ttl = excluded.metadata_ttl,
+                failure_count = excluded.failure_count,
+                backoff_until = excluded.backoff_until,
+                failure_reason = excluded.failure_reason
+            """,
+            (
+                server.guild_id, server.guild_name, server.channel_id,
+                server.channel_name, server.next_bump_timestamp,
+                server.names_refreshed_at, server.metadata_ttl,
+                server.failure_count, server.backoff_until, server.failure_reason
+            )
+        )
+
+    def delete_server(self, guild_id: int):
+        self._connection.execute("DELETE FROM servers WHERE guild_id = ?", (guild_id,))
+
+    def load_pending_attempts(self) -> list[PendingAttempt]:
+        rows = self._connection.execute("SELECT guild_id, selfbot_id, sent_at FROM pending_attempts")
+        return [PendingAttempt(*row) for row in rows]
+
+    def save_pending_attempt(self, attempt: PendingAttempt):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO pending_attempts (guild_id, selfbot_id, sent_at) VALUES (?, ?, ?)",
+            (attempt.guild_id, attempt.selfbot_id, attempt.sent_at)
+        )
+
+    def delete_pending_attempt(self, guild_id: int):
+        self._connection.execute("DELETE FROM pending_attempts WHERE guild_id = ?", (guild_id,))
+
+    def _get_data_version(self) -> int:
+        # only changes when another connection commits
+        return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def reload(self):
+        self._data_version = self._get_data_version()
+
+    def changed_externally(self) -> bool:
+        return self._get_data_version() != self._data_version
+
+    def watched_paths(self) -> list[Path]:
+        # in WAL mode, the commits are written to the -wal file first
+        return [self._path, self._path.with_name(self._path.name + "-wal")]
+
+    def save_server_order(self, guild_ids: list[int]):
+        with self.transaction():
+            self._connection.executemany(
+                "UPDATE servers SET position = ? WHERE guild_id = ?",
+                [(position, guild_id) for position, guild_id in enumerate(guild_ids)]
+            )
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self._depth == 0:
+            self._connection.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self._connection.execute("ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self._connection.execute("COMMIT")
+
+    def close(self):
+        self._connection.close()
+
+def open_storage(data_dir: Path, backend: str = "sqlite") -> StorageBackend:
+    """
+    Open the storage backend of a data directory.
+
+    Parameters
+    ----------
+    data_dir : Path
+        The directory containing the data files.
+    backend : str, optional
+        "sqlite" (default) or "json".
+
+    Returns
+    -------
+    StorageBackend
+        The opened storage.
+    """
+
+    if backend == "json":
+        return JsonStorage(data_dir)
+    if backend == "sqlite":
+        return SqliteStorage(data_dir / "autobumper.db")
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+def _read_json(path: Path, default, strict: bool = False):
+    if not path.exists():
+        return default
+    with open(path, "r", encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            if strict:
+                raise SchemaError(f"{path} is not valid JSON: {e}") from e
+            console.print(f"Error loading file: {path}")
+            return default
+
+def _file_signature(path: Path) -> tuple[int, int, int] | None:
+    """Return what changes when a file is written or replaced, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def _write_json_atomic(path: Path, data):
+    """Write a JSON file through a temporary file replaced atomically."""
+    temporary_path = path.with_suffix(path.suffix + ".tmp")
+    with open(temporary_path, "w", encoding='utf-8') as file:
+        json.dump(data, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
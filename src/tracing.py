@@ -0,0 +1,222 @@
+from contextlib import contextmanager
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Iterable, Iterator, Optional
+
+from rich.table import Table
+from rich import box
+
+from src.clock import SYSTEM_CLOCK, Clock
+from src.console import console
+
+logger = logging.getLogger(__name__)
+
+# Size after which the trace file is rotated, in bytes
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+# Number of rotated trace files kept
+TRACE_BACKUP_COUNT = 5
+# Phases of a bump attempt, in order
+PHASES = ("connect", "channel_lookup", "command_lookup", "send", "response", "persist")
+
+class BumpSpan():
+    """
+    The timings of one bump attempt: one server, one account.
+
+    Attributes
+    ----------
+    guild_id : int or None
+        The ID of the bumped server.
+    selfbot_id : int or None
+        The ID of the account used.
+    started_at : float
+        The timestamp of the start of the attempt.
+    phases : dict[str, tuple[float, float]]
+        The start timestamp and the duration in seconds of each phase run. A
+        phase run several times, such as a second "send" after a rejected
+        cached command, keeps its first start and the sum of its durations.
+    outcome : str or None
+        "success", "cooldown", "unknown_reply", "timeout", "error" or "no_session"
+        once finished.
+    """
+
+    def __init__(self, guild_id: Optional[int] = None, selfbot_id: Optional[int] = None, clock: Clock = SYSTEM_CLOCK):
+        self.guild_id = guild_id
+        self.selfbot_id = selfbot_id
+        self._clock = clock
+        self.started_at = self._wall_time()
+        self._started = time.perf_counter()
+        self.phases: dict[str, tuple[float, float]] = {}
+        self.outcome: Optional[str] = None
+        self.duration: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record the duration of the `with` block as the phase `name`, added to its previous runs."""
+
+        started_at = self._wall_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if name in self.phases:
+                started_at, previous = self.phases[name]
+                duration += previous
+            self.phases[name] = (started_at, duration)
+
+    def _wall_time(self) -> float:
+        # the traces are read by other programs, in system time
+        return self._clock.to_wall(self._clock.time())
+
+    def finish(self, outcome: str):
+        self.outcome = outcome
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "Timestamp": self.started_at,
+            "GuildId": self.guild_id,
+            "SelfbotId": self.selfbot_id,
+            "Outcome": self.outcome,
+            "Duration": self.duration,
+            "Phases": {
+                name: {"Start": start, "Duration": duration}
+                for name, (start, duration) in self.phases.items()
+            }
+        }
+
+class TraceWriter():
+    """
+    Appends finished spans to a JSONL file, one span per line.
+
+    When the file grows over `max_bytes`, it is renamed with a `.1` suffix,
+    the previous backups are shifted, and the oldest one is deleted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = TRACE_MAX_BYTES, backup_count: int = TRACE_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+
+    def write(self, span: BumpSpan):
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding='utf-8')
+            self._file.write(json.dumps(span.to_dict()) + "\n")
+            self._file.flush()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            logger.warning(f"Could not write the bump trace to {self.path}: {e}")
+
+    def _rotate(self):
+        self.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def trace_files(path: Path) -> list[Path]:
+    """Return the trace file and its backups, oldest first."""
+
+    backups = sorted(
+        (candidate for candidate in path.parent.glob(f"{path.name}.*") if candidate.suffix[1:].isdigit()),
+        key=lambda candidate: int(candidate.suffix[1:]),
+        reverse=True
+    )
+    return backups + ([path] if path.exists() else [])
+
+def read_spans(paths: Iterable[Path]) -> Iterator[dict]:
+    """Stream the spans of trace files, skipping the lines which are not valid JSON."""
+
+    for path in paths:
+        with open(path, "r", encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # a line cut by a crash
+                    continue
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    index = min(len(values) - 1, max(0, round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+def display_trace_summary(path: Path, guild_id: Optional[int] = None):
+    """
+    Print the p50/p95/p99 latencies of the traced bumps, per phase and per server.
+
+    Parameters
+    ----------
+    path : Path
+        The trace file. Its rotated backups are read too.
+    guild_id : int, optional
+        Only summarize the bumps of this server.
+    """
+
+    files = trace_files(path)
+    if not files:
+        console.print(f"[yellow]No trace found at {path}.[/]")
+        return
+
+    phases: dict[str, list[float]] = {}
+    servers: dict[int, list[float]] = {}
+    outcomes: dict[int, dict[str, int]] = {}
+    for span in read_spans(files):
+        span_guild_id = span.get("GuildId")
+        if guild_id is not None and span_guild_id != guild_id:
+            continue
+        for name, timing in span.get("Phases", {}).items():
+            phases.setdefault(name, []).append(timing["Duration"])
+        if span.get("Duration") is not None:
+            servers.setdefault(span_guild_id, []).append(span["Duration"])
+        server_outcomes = outcomes.setdefault(span_guild_id, {})
+        outcome = span.get("Outcome") or "unknown"
+        server_outcomes[outcome] = server_outcomes.get(outcome, 0) + 1
+
+    if not outcomes:
+        console.print("[yellow]No bump traced.[/]")
+        return
+
+    phase_table = _latency_table("Latency per phase", "Phase")
+    for name in sorted(phases, key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES)):
+        _add_latency_row(phase_table, name, phases[name])
+    console.print(phase_table)
+
+    server_table = _latency_table("Latency per server", "Server")
+    server_table.add_column("Outcomes", style="white")
+    for span_guild_id, durations in servers.items():
+        summary = ", ".join(f"{outcome}: {count}" for outcome, count in sorted(outcomes[span_guild_id].items()))
+        _add_latency_row(server_table, str(span_guild_id), durations, summary)
+    console.print(server_table)
+
+def _latency_table(title: str, label: str) -> Table:
+    table = Table(title=title, box=box.ROUNDED)
+    table.add_column(label, style="cyan")
+    table.add_column("Count", justify="right")
+    for column in ("p50 (ms)", "p95 (ms)", "p99 (ms)"):
+        table.add_column(column, justify="right", style="green")
+    return table
+
+def _add_latency_row(table: Table, label: str, durations: list[float], *extra: str):
+    durations.sort()
+    table.add_row(
+        label, str(len(durations)),
+        *(f"{percentile(durations, fraction) * 1000:.1f}" for fraction in (0.5, 0.95, 0.99)),
+        *extra
+    )